@@ -2,15 +2,35 @@ VERSION = "v-0.0.11"
 GITHUB_USERNAME = "YuvalTuby"
 
 import pygame
+import math
+import os
 import sys
-from tkinter import Tk
-from tkinter.filedialog import asksaveasfilename
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 
+from pascalMath import LRUCache, cached_binomial_mod, residue_cache
+from pascalRaster import (index_image_rows, index_image_to_rgba, iter_crt_index_frames, residue_store, row_offsets,
+                          triangle_index_image)
+from pascalPalette import CYCLE_STEPS, cycle_lut, lut_cache, lut_to_rgba, packed_lut, palette_colors, parse_colors, set_custom_colors
+from pascalProfiler import instrumentation
+
 # Gets hold of file directory
 FILE_DIR = Path(__file__).resolve().parent
 
+# Directory for precomputed residue files (reused across restarts), unset to keep them in memory only
+RESIDUE_CACHE_DIR = os.environ.get("PASCAL_RESIDUE_DIR")
+
+# Palette scheme ("hsv", "rainbow" or "custom") and the custom colors for remainders 0, 1, ...,
+# e.g. PASCAL_PALETTE=custom PASCAL_COLORS=ffffff,000000
+PALETTE_SCHEME = os.environ.get("PASCAL_PALETTE", "hsv")
+CUSTOM_COLORS = os.environ.get("PASCAL_COLORS", "")
+
+# Instrumentation (stage timers, counters, overlay) on from the start when set, F8 toggles it,
+# F9 starts/stops a cProfile capture and F10 dumps everything into PROFILE_DIR
+PROFILE_ENABLED = bool(os.environ.get("PASCAL_PROFILE"))
+PROFILE_DIR = os.environ.get("PASCAL_PROFILE_DIR", ".")
+
 # Window size
 WINDOW_SIZE = 1000;
 
@@ -32,6 +52,18 @@ SMALL_CELL_SIZE, SMALL_CELL_ROWS = CELL_SIZES_AND_ROWS["Small"]
 SUPER_SMALL_CELL_SIZE, SUPER_SMALL_CELL_ROWS = CELL_SIZES_AND_ROWS["Super Small"]
 SMALLEST_CELL_SIZE, SMALLEST_CELL_ROWS = CELL_SIZES_AND_ROWS["Smallest"]
 
+# Frame-rate cap for the UI loops
+FPS = 60
+
+# Time spent drawing per frame by progressive renders, in ms
+RENDER_BUDGET_MS = 12
+
+# Viewport (zoom/pan) mode: zoom factor per wheel notch, pixel rows per render step,
+# and how much coarser the preview drawn right after a move is
+VIEWPORT_ZOOM_STEP = 1.25
+VIEWPORT_BAND_ROWS = 16
+VIEWPORT_PREVIEW_SCALE = 4
+
 # UI Color Constants
 BUTTON_COLOR = (240, 240, 240)  # Light gray
 BUTTON_HOVER_COLOR = (180, 180, 180)  # Darker gray for hover
@@ -72,36 +104,14 @@ def change_window_size():
 
 def generate_color_palette(divisor):
     """Generate a color palette based on the divisor."""
-    num_remainders = divisor  # Possible remainder values range from 0 to divisor-1
-    palette = []
-    
-    # Set a specific green color for remainder 0
-    #palette.append((50, 168, 82))  # Green for remainder 0
-    palette.append((0,0,0))  # Black for remainder 0
-    
-    # Generate colors for remaining values
-    for i in range(1, num_remainders):
-        # Use HSV color space to generate distinct, evenly spaced colors
-        hue = i / (num_remainders - 1)  # Scale hue from 0 to 1, excluding 0
-        color = pygame.Color(0)  # Create a blank color object
-        color.hsva = (hue * 360, 100, 100)  # Set the color in HSV (Hue, Saturation, Value)
-        palette.append(color)
-    
-    return palette
+    # Black for remainder 0, then evenly spaced hues (see pascalPalette),
+    # built once per divisor and scheme
+    return palette_colors(divisor, PALETTE_SCHEME)
 
 
-# Memoization dictionary to store binomial coefficients
-binomial_cache = {}
-
-# Function to calculate the binomial coefficient with memoization
+# Function to calculate the exact binomial coefficient (only used for cell labels)
 def binomial_coefficient(n, k):
-    if k == 0 or k == n:
-        return 1
-    if (n, k) in binomial_cache:
-        return binomial_cache[(n, k)]
-    result = binomial_coefficient(n - 1, k - 1) + binomial_coefficient(n - 1, k) # Recursive call of nCk
-    binomial_cache[(n, k)] = result
-    return result
+    return math.comb(n, k)
 
 def simulate_large_pascals_triangle(screen, cell_size, divisor, max_rows=5000, displayed_rows=800):
     """
@@ -122,9 +132,11 @@ def simulate_large_pascals_triangle(screen, cell_size, divisor, max_rows=5000, d
     for displayed_row in range(displayed_rows):
         # Calculate the corresponding "real" row
         real_row = int(displayed_row * scaling_factor)
+        # Precomputed rows (in memory or in the residue files) are read directly
+        stored_row = residue_store.row(divisor, real_row)
         for k in range(real_row + 1):
-            value = binomial_coefficient(real_row, k)
-            remainder = value % divisor
+            # Otherwise a direct lookup, no earlier rows needed
+            remainder = stored_row[k] if stored_row is not None else cached_binomial_mod(real_row, k, divisor)
             color = colors[remainder]
             
             # Calculate position
@@ -133,87 +145,454 @@ def simulate_large_pascals_triangle(screen, cell_size, divisor, max_rows=5000, d
             
             # Draw cell
             pygame.draw.rect(screen, color, (x, y, cell_size, cell_size))
+        instrumentation.count("rects", real_row + 1)
         
         # Update display every few rows for smoother drawing
         if displayed_row % 100 == 0:
-            pygame.display.flip()
+            update_display()
 
-def draw_pascals_triangle(screen, divisor, cell_size, show_rem=False):
-    
-    """Draw Pascal's triangle with updated color palette."""
-    # Generate the dynamic color palette based on the divisor
-    colors = generate_color_palette(divisor)
-    rows = 10
-    
+def rows_for_cell_size(cell_size):
+    """Number of rows drawn for a given cell size."""
     for size, (size_value, row_value) in CELL_SIZES_AND_ROWS.items():
         if cell_size == size_value:
-            rows = row_value
-            break
-    
+            return row_value
+    return 10
+
+def draw_pascals_triangle(screen, divisor, cell_size, show_rem=False):
     """Draw Pascal's triangle with updated color palette."""
+    for _ in iter_pascals_triangle(screen, divisor, cell_size, show_rem):
+        pass
+
+def iter_pascals_triangle(screen, divisor, cell_size, show_rem=False, chunk_rows=16):
+    """
+    Draw Pascal's triangle a few rows at a time.
+    Yields the rectangle drawn by each step, so a caller can update the display and
+    handle events between steps (see pump_render).
+    """
+    # Cached lookup table of the dynamic color palette
+    lut = packed_lut(divisor, PALETTE_SCHEME)
+    rows = rows_for_cell_size(cell_size)
+    
     start_x = WINDOW_SIZE // 2
     start_y = 20
-
-    for n in range(rows):
+    
+    # Rows already computed for this divisor are reused from the store,
+    # each chunk of rows is rasterized at once and blit in a single transfer
+    with instrumentation.stage("residues"):
+        residues = residue_store.triangle(divisor, rows)
+    _, origin_x = row_offsets(rows, cell_size)
+    for first_row in range(0, rows, chunk_rows):
+        block = residues[first_row:first_row + chunk_rows]
+        with instrumentation.stage("rasterize"):
+            image = index_image_rows(block, first_row, rows, cell_size)
+        position = (start_x + origin_x, start_y + first_row * cell_size)
+        with instrumentation.stage("blit"):
+            blit_index_image(screen, image, lut, position)
+        dirty = pygame.Rect(position, (image.shape[1], image.shape[0]))
+        # Cells in rows first_row..first_row+len(block)-1
+        instrumentation.count("cells", (2 * first_row + len(block) + 1) * len(block) // 2)
+        
+        if show_rem or cell_size == BIG_CELL_SIZE:
+            # Optionally add text inside each cell
+            with instrumentation.stage("labels"):
+                draw_cell_labels(screen, residues, first_row, first_row + len(block), cell_size, start_x, start_y)
+        yield dirty
+
+def draw_cell_labels(screen, residues, first_row, last_row, cell_size, start_x, start_y):
+    """Write nCk inside the cells of rows first_row..last_row-1."""
+    for n in range(first_row, last_row):
         for k in range(n + 1):
-            value = binomial_coefficient(n, k)
-            remainder = value % divisor
-            color = colors[remainder % len(colors)]  # Cycle through colors
+            remainder = residues[n, k]
             x = start_x + (k - n / 2) * cell_size
             y = start_y + n * cell_size
-            
-            pygame.draw.rect(screen, color, (x, y, cell_size, cell_size))
-            if show_rem or cell_size == BIG_CELL_SIZE:
-                # Optionally add text inside each cell
-                font = pygame.font.Font(None, 24)
-                text_color = (255, 255, 255) if remainder == 0 else (0, 0, 0)  # White text for 0, black for others
-                text = font.render(str(value), True, text_color)  # White text
-                text_rect = text.get_rect(center=(x + cell_size / 2, y + cell_size / 2))
-                screen.blit(text, text_rect)
-              
-        # # For SMALLEST_CELL_SIZE, update display every few rows for smoother drawing  
-        # if n % 100 == 0:
-        #     pygame.display.flip()
+            text_color = (255, 255, 255) if remainder == 0 else (0, 0, 0)  # White text for 0, black for others
+            text = render_text(str(binomial_coefficient(n, k)), 24, text_color)  # White text
+            text_rect = text.get_rect(center=(x + cell_size / 2, y + cell_size / 2))
+            # Keep long values inside their own cell
+            screen.set_clip((x, y, cell_size, cell_size))
+            screen.blit(text, text_rect)
+    screen.set_clip(None)
+
+def blit_index_image(surface, image, lut, position):
+    """Map a palette-indexed image through the LUT and blit it with one buffer transfer."""
+    rgba = index_image_to_rgba(image, lut)
+    height, width = image.shape
+    cells = pygame.image.frombuffer(rgba, (width, height), "RGBA")
+    surface.blit(cells, position)
         
 def draw_color_mods(screen, divisor):
     
     colors = generate_color_palette(divisor)
     font_size = int(WINDOW_SIZE * 0.036)  # 3.6% of window size
-    font = pygame.font.Font(None, font_size)
     
     for i in range(divisor):
         x = WINDOW_SIZE * 0.62 + 22 * i - 22 * 14 * (i // 14)
         y = WINDOW_SIZE * 0.09 + 22 * (i // 14)
         pygame.draw.rect(screen, colors[i], (x, y, 20, 20))
         text_color = (255, 255, 255) if i == 0 else (0, 0, 0)  # White text for 0, black for others
-        text = font.render(str(i), True, text_color)
+        text = render_text(str(i), font_size, text_color)
         text_rect = text.get_rect(center=(x + 10, y + 10))
         screen.blit(text, text_rect)
-        pygame.display.flip()
+    update_display()
                 
+def draw_triangle_frames(screen, divisors, cell_size):
+    """Draw the triangles of several divisors one after another.
+    Each prime power is computed once and composite divisors are assembled from them (CRT).
+    Yields each divisor once its triangle is on screen."""
+    start_x = WINDOW_SIZE // 2
+    start_y = 20
+    for divisor, image, origin_x in iter_crt_index_frames(divisors, rows_for_cell_size(cell_size), cell_size):
+        lut = packed_lut(divisor, PALETTE_SCHEME)
+        blit_index_image(screen, image, lut, (start_x + origin_x, start_y))
+        yield divisor
+
 def draw_prime_pascal_triangles(screen, divisor, cell_size, show_rem=False):
+    return pump_render(iter_prime_pascal_triangles(screen, divisor, cell_size, show_rem))
+
+def iter_prime_pascal_triangles(screen, divisor, cell_size, show_rem=False):
     # Draw pascale triangles of prime numbers with delay
-    for i in range(2, divisor + 1):
-        if is_prime(i):
-            draw_pascals_triangle(screen, i, cell_size, show_rem)
-            draw_divisor_and_rows_text(i, CELL_SIZES_AND_ROWS["Super Small"][1])
-            pygame.display.flip()
-            pygame.time.wait(700)
-            pygame.draw.rect(screen, (20, 20, 40), (300, 0, 700, 1000))
-            draw_basad_text()
+    primes = [i for i in range(2, divisor + 1) if is_prime(i)]
+    if show_rem:
+        # Labels need the per-cell path
+        def draw_labeled_frames():
+            for i in primes:
+                draw_pascals_triangle(screen, i, cell_size, show_rem)
+                yield i
+        frames = draw_labeled_frames()
+    else:
+        frames = draw_triangle_frames(screen, primes, cell_size)
+    for i in frames:
+        draw_divisor_and_rows_text(i, CELL_SIZES_AND_ROWS["Super Small"][1])
+        yield screen.get_rect()
+        yield from pause(700)
+        pygame.draw.rect(screen, (20, 20, 40), (300, 0, 700, 1000))
+        draw_basad_text()
             
 def draw_increasing_pascal_triangles(screen, divisor, cell_size):
+    return pump_render(iter_increasing_pascal_triangles(screen, divisor, cell_size))
+
+def iter_increasing_pascal_triangles(screen, divisor, cell_size):
     # Draw pascale triangles of numbers in increasing order
-    for i in range(2, divisor + 1):
-        draw_pascals_triangle(screen, i, cell_size)
+    for i in draw_triangle_frames(screen, range(2, divisor + 1), cell_size):
         draw_divisor_and_rows_text(i, CELL_SIZES_AND_ROWS["Super Small"][1])
-        pygame.display.flip()
+        # One frame per divisor
+        yield screen.get_rect()
+        yield None
         #pygame.time.wait(100)
         
         ## Fix problem when trying to add delay in paramaters
         
         pygame.draw.rect(screen, (20, 20, 40), (300, 0, 700, 1000))
         draw_basad_text()
+
+def iter_mode(mode, divisor, cell_size):
+    """Steps of drawing one mode's screen (for pump_render)."""
+    # Clear only triangle area (right side of screen)
+    pygame.draw.rect(screen, (20, 20, 40), (300, 0, 700, 1000))
+    draw_basad_text()
+    yield screen.get_rect()
+    
+    # Draw triangle
+    if mode in ("Big", "Medium", "Small", "Super Small", "Smallest"):
+        yield from iter_pascals_triangle(screen, divisor, cell_size)
+        draw_divisor_and_rows_text(divisor, CELL_SIZES_AND_ROWS[mode][1])
+        draw_color_mods(screen, divisor)
+        
+        # Check if div=2 for Sierpinski triangle text
+        if(divisor == 2):
+            draw_sierpinski_text()
+        
+    elif mode == "Primes":
+        yield from iter_prime_pascal_triangles(screen, divisor, cell_size)
+        yield from iter_pascals_triangle(screen, divisor, cell_size)
+        draw_divisor_and_rows_text(divisor, CELL_SIZES_AND_ROWS[mode][1])
+    elif mode == "Increasing":
+        # TODO:
+        # Show input box to ask for the delay time
+        #delay_input = get_input("Delay (ms): ", int(WINDOW_SIZE * 0.05), int(WINDOW_SIZE * 0.15))
+        yield from iter_increasing_pascal_triangles(screen, divisor, cell_size)
+        yield from iter_pascals_triangle(screen, divisor, cell_size)
+        draw_divisor_and_rows_text(divisor, CELL_SIZES_AND_ROWS[mode][1])
+    
+    draw_reset_text()  # Add reset text
+    yield screen.get_rect()
+
+def mode_cell_size(mode):
+    """Cell size used by a mode button."""
+    if mode in CELL_SIZES_AND_ROWS:
+        return CELL_SIZES_AND_ROWS[mode][0]
+    return BIG_CELL_SIZE
+
+def pause(ms):
+    """Render step that waits ms milliseconds without blocking the event loop."""
+    end = pygame.time.get_ticks() + ms
+    while pygame.time.get_ticks() < end:
+        yield None
+
+def pump_render(steps, budget_ms=RENDER_BUDGET_MS, buttons=()):
+    """
+    Run a progressive render, spending at most budget_ms per frame on its steps and
+    handling events in between so the window stays responsive.
+    Steps yield the rectangle they drew, or None to end the current frame early.
+    Returns None when the render finished, otherwise the event that interrupted it
+    (ESC/Enter or a left click on one of buttons, other clicks are ignored).
+    """
+    clock = pygame.time.Clock()
+    steps = iter(steps)
+    finished = False
+    while not finished:
+        finished = run_render_steps(steps, budget_ms)
+        
+        for event in handle_instrumentation_keys(pygame.event.get()):
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                sys.exit()
+            # Wheel scrolls arrive as buttons 4 and 5, only a left click on a button interrupts
+            clicked = (event.type == pygame.MOUSEBUTTONDOWN and event.button == 1
+                       and hovered_button(buttons, event.pos) is not None)
+            if clicked or (
+                    event.type == pygame.KEYDOWN and event.key in (pygame.K_RETURN, pygame.K_ESCAPE)):
+                steps.close()
+                draw_instrumentation_overlay()
+                return event
+        clock.tick(FPS)
+    draw_instrumentation_overlay()
+    return None
+
+
+def run_render_steps(steps, budget_ms=RENDER_BUDGET_MS):
+    """Advance a progressive render for at most budget_ms and update what it drew.
+    Returns True once the render is finished."""
+    deadline = pygame.time.get_ticks() + budget_ms
+    dirty = []
+    finished = False
+    while pygame.time.get_ticks() < deadline:
+        rect = next(steps, False)
+        if rect is False:
+            finished = True
+            break
+        if rect is None:
+            break
+        dirty.append(rect)
+    update_display(dirty)
+    return finished
+
+def update_display(rects=None):
+    """pygame.display.flip (rects None) or update(rects), timed and counted by the instrumentation."""
+    with instrumentation.stage("display"):
+        if rects is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(rects)
+    instrumentation.count("flips")
+
+def handle_instrumentation_keys(events):
+    """F8 toggles the instrumentation, F9 a cProfile capture, F10 dumps them to PROFILE_DIR.
+    Returns events unchanged, so loops can call it on whatever they got."""
+    for event in events:
+        if event.type != pygame.KEYDOWN or event.key not in (pygame.K_F8, pygame.K_F9, pygame.K_F10):
+            continue
+        if event.key == pygame.K_F8:
+            instrumentation.enabled = not instrumentation.enabled
+            if not instrumentation.enabled:
+                instrumentation.stop_profile()
+        elif event.key == pygame.K_F9:
+            if instrumentation.profiling:
+                instrumentation.stop_profile()
+            else:
+                instrumentation.start_profile()
+        else:
+            for path in instrumentation.dump(PROFILE_DIR):
+                print(f"Profile written to {path}")
+        draw_instrumentation_overlay(clear=True)
+    return events
+
+def draw_instrumentation_overlay(clear=False):
+    """Stage timings, counters and cache hit rates next to the version text."""
+    area = pygame.Rect(110, 4, int(WINDOW_SIZE * 0.35), 64)
+    if not instrumentation.enabled and not clear:
+        return
+    screen.fill((20, 20, 40), area)
+    if instrumentation.enabled:
+        lines = instrumentation.summary_lines()
+        if instrumentation.profiling:
+            lines[-1] += "   (profiling)"
+        screen.set_clip(area)
+        for i, line in enumerate(lines):
+            screen.blit(render_text(line, 18, (200, 200, 120)), (area.x, area.y + i * 16))
+        screen.set_clip(None)
+    pygame.display.update(area)
+
+
+def viewport_area():
+    """Screen rectangle used by the zoom/pan viewport, right of the buttons."""
+    left = int(WINDOW_SIZE * 0.3)
+    return pygame.Rect(left, 0, WINDOW_SIZE - left, WINDOW_SIZE)
+
+def iter_viewport(screen, area, viewport, divisor, lut, downsample):
+    """
+    Draw the viewport progressively: a coarse preview first when zoomed out (direct
+    lookups get expensive there), then full resolution bands from top to bottom.
+    """
+    from pascalViewport import viewport_index_image
+
+    if viewport.zoom > 1:
+        scale = VIEWPORT_PREVIEW_SCALE
+        preview = viewport_index_image(divisor, -(-area.width // scale), -(-area.height // scale),
+                                       viewport.top_row, viewport.left_col, viewport.zoom * scale, "sample")
+        rgba = index_image_to_rgba(preview, lut)
+        cells = pygame.image.frombuffer(rgba, (preview.shape[1], preview.shape[0]), "RGBA")
+        screen.blit(pygame.transform.scale(cells, (preview.shape[1] * scale, preview.shape[0] * scale)),
+                    area.topleft)
+        draw_viewport_info(screen, area, viewport, divisor, downsample)
+        yield area
+        yield None
+    
+    for y in range(0, area.height, VIEWPORT_BAND_ROWS):
+        rows = min(VIEWPORT_BAND_ROWS, area.height - y)
+        with instrumentation.stage("viewport"):
+            image = viewport_index_image(divisor, area.width, rows, viewport.top_row + y * viewport.zoom,
+                                         viewport.left_col, viewport.zoom, downsample)
+        blit_index_image(screen, image, lut, (area.x, area.y + y))
+        yield pygame.Rect(area.x, area.y + y, area.width, rows)
+    draw_viewport_info(screen, area, viewport, divisor, downsample)
+    yield area
+
+def draw_viewport_info(screen, area, viewport, divisor, downsample):
+    """Position, zoom and controls of the viewport, over its top edge."""
+    font_size = int(WINDOW_SIZE * 0.022)
+    lines = [
+        f"mod: {divisor}   row: {viewport.top_row:.6g}   col: {viewport.center_col:.6g}   "
+        f"zoom: {viewport.zoom:.3g} cells/px   ({downsample})",
+        "Arrows/drag: pan   PgUp/PgDn: page   Wheel or +/-: zoom   M: downsample   ESC/Enter: back",
+    ]
+    for i, line in enumerate(lines):
+        text = render_text(line, font_size, (255, 255, 255))
+        position = (area.x + 8, area.y + 6 + i * font_size)
+        screen.fill((20, 20, 40), text.get_rect(topleft=position))
+        screen.blit(text, position)
+
+def run_viewport(divisor, cell_size):
+    """
+    Interactive zoom/pan over the mod-divisor triangle, starting from the current view.
+    Only the visible cells are computed, so any row depth can be reached.
+    Returns when ESC/Enter is pressed.
+    """
+    # The viewport engine is only loaded when the mode is first opened
+    from pascalViewport import DOWNSAMPLE_MODES, Viewport, supports_divisor
+
+    if not supports_divisor(divisor):
+        # Lookups for such divisors would freeze the window
+        print(f"Zooming is not supported for {divisor}, its prime powers are too large")
+        return
+
+    area = viewport_area()
+    viewport = Viewport(area.width, area.height, zoom=1 / cell_size)
+    # Same placement as the static modes: row 0 at the top, center line at the window center
+    viewport.top_row = -20 * viewport.zoom
+    viewport.center_col = (area.width / 2 - (WINDOW_SIZE // 2 - area.x)) * viewport.zoom
+    lut = packed_lut(divisor, PALETTE_SCHEME, (20, 20, 40))
+    downsample = DOWNSAMPLE_MODES[1]
+    
+    clock = pygame.time.Clock()
+    steps = None
+    moved = True
+    dragging = False
+    while True:
+        if moved:
+            if steps is not None:
+                steps.close()
+            steps = iter_viewport(screen, area, viewport, divisor, lut, downsample)
+            moved = False
+        if steps is None:
+            events = wait_for_events(clock)
+        else:
+            if run_render_steps(steps):
+                steps = None
+            events = handle_instrumentation_keys(pygame.event.get())
+            clock.tick(FPS)
+        
+        for event in events:
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                sys.exit()
+            if event.type == pygame.KEYDOWN:
+                if event.key in (pygame.K_RETURN, pygame.K_ESCAPE):
+                    if steps is not None:
+                        steps.close()
+                    return
+                pans = {
+                    pygame.K_LEFT: (-area.width / 8, 0), pygame.K_RIGHT: (area.width / 8, 0),
+                    pygame.K_UP: (0, -area.height / 8), pygame.K_DOWN: (0, area.height / 8),
+                    pygame.K_PAGEUP: (0, -area.height), pygame.K_PAGEDOWN: (0, area.height),
+                }
+                if event.key in pans:
+                    viewport.pan(*pans[event.key])
+                elif event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                    viewport.zoom_at(1 / 2, area.width / 2, area.height / 2)
+                elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                    viewport.zoom_at(2, area.width / 2, area.height / 2)
+                elif event.key == pygame.K_m:
+                    downsample = DOWNSAMPLE_MODES[(DOWNSAMPLE_MODES.index(downsample) + 1) % len(DOWNSAMPLE_MODES)]
+                else:
+                    continue
+                moved = True
+            elif event.type == pygame.MOUSEWHEEL:
+                # Zoom around the cell under the mouse, or the center when it is outside the viewport
+                position = pygame.mouse.get_pos()
+                x, y = position if area.collidepoint(position) else area.center
+                viewport.zoom_at(VIEWPORT_ZOOM_STEP ** -event.y, x - area.x, y - area.y)
+                moved = True
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and area.collidepoint(event.pos):
+                dragging = True
+            elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+                dragging = False
+            elif event.type == pygame.MOUSEMOTION and dragging:
+                # The triangle follows the mouse
+                viewport.pan(-event.rel[0], -event.rel[1])
+                moved = True
+
+
+def run_rainbow(divisor, cell_size):
+    """
+    Cycle the triangle's colors until a key or mouse button is pressed.
+    The residues are written once into an 8-bit surface as pixel indices, every frame
+    only replaces its palette. Divisors above 255 do not fit in 8 bits and remap the
+    index image through a packed lookup table per frame instead.
+    """
+    rows = rows_for_cell_size(cell_size)
+    image, origin_x = triangle_index_image(residue_store.triangle(divisor, rows), cell_size)
+    height, width = image.shape
+    position = (WINDOW_SIZE // 2 + origin_x, 20)
+    rect = pygame.Rect(position, (width, height))
+    indexed = divisor < 256
+    if indexed:
+        cells = pygame.image.frombuffer(image.astype("uint8").tobytes(), (width, height), "P")
+        # Index 0 (outside the triangle) is not drawn
+        cells.set_colorkey(0)
+    
+    clock = pygame.time.Clock()
+    step = 0
+    while True:
+        lut = cycle_lut(divisor, step, (20, 20, 40))
+        if indexed:
+            cells.set_palette(lut_to_rgba(lut)[:, :3].tolist())
+            screen.blit(cells, position)
+        else:
+            blit_index_image(screen, image, lut, position)
+        update_display(rect)
+        step = (step + 1) % CYCLE_STEPS
+        
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                sys.exit()
+            if event.type in (pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN):
+                # Back to the normal colors (and labels), the residues are still in the store
+                draw_pascals_triangle(screen, divisor, cell_size)
+                update_display(rect)
+                return
+        clock.tick(FPS)
             
             
 def is_prime(n):
@@ -229,7 +608,6 @@ def is_prime(n):
 def get_input(prompt, x, y):
     pygame.font.init()
     font_size = int(WINDOW_SIZE * 0.036)  # 3.6% of window size
-    font = pygame.font.Font(None, font_size)
     input_box = pygame.Rect(x, y, font_size * 5, font_size * 1.05)
     color_inactive = pygame.Color('lightskyblue3')
     color_active = pygame.Color('dodgerblue2')
@@ -237,9 +615,19 @@ def get_input(prompt, x, y):
     active = False
     text = ''
     done = False
+    dirty = True  # Redraw the box only when the text or focus changed
+    clock = pygame.time.Clock()
 
     while not done:
-        for event in pygame.event.get():
+        if dirty:
+            screen.fill((30, 30, 30), input_box)
+            txt_surface = render_text(prompt + text, font_size, color)
+            screen.blit(txt_surface, (input_box.x + 5, input_box.y + 5))
+            pygame.draw.rect(screen, color, input_box, 2)
+            update_display(input_box)
+            dirty = False
+        
+        for event in wait_for_events(clock):
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
@@ -249,6 +637,7 @@ def get_input(prompt, x, y):
                 else:
                     active = False
                 color = color_active if active else color_inactive
+                dirty = True
             if event.type == pygame.KEYDOWN:
                 if active:
                     if event.key == pygame.K_RETURN:
@@ -257,15 +646,40 @@ def get_input(prompt, x, y):
                         text = text[:-1]
                     else:
                         text += event.unicode
-
-        screen.fill((30, 30, 30), input_box)
-        txt_surface = font.render(prompt + text, True, color)
-        screen.blit(txt_surface, (input_box.x + 5, input_box.y + 5))
-        pygame.draw.rect(screen, color, input_box, 2)
-        pygame.display.flip()
+                    dirty = True
 
     return text
 
+def wait_for_events(clock):
+    """Block until events arrive instead of busy polling, at most FPS times per second."""
+    clock.tick(FPS)
+    return handle_instrumentation_keys([pygame.event.wait()] + pygame.event.get())
+
+def hovered_button(buttons, pos):
+    """Text of the button under pos, or None."""
+    for rect, hover, text in buttons:
+        if rect.collidepoint(pos):
+            return text
+    return None
+
+# Rendered text surfaces keyed by (size, text, color), least recently used ones are dropped
+glyph_cache = LRUCache(max_entries=4096)
+
+@lru_cache(maxsize=16)
+def get_font(size):
+    """Default pygame font of the given size, created once per size."""
+    return pygame.font.Font(None, size)
+
+def render_text(text, size, color):
+    """Render text with the default font, reusing the surface if it was rendered before."""
+    key = (size, text, tuple(color))
+    surface = glyph_cache.get(key)
+    if surface is None:
+        with instrumentation.stage("fonts"):
+            surface = get_font(size).render(text, True, color)
+        glyph_cache.put(key, surface)
+    return surface
+
 def draw_button(screen, text, x, y, width, height, color, font_size=36):
     # Get mouse position and create button rectangle
     mouse_pos = pygame.mouse.get_pos()
@@ -277,8 +691,7 @@ def draw_button(screen, text, x, y, width, height, color, font_size=36):
     # Draw button with appropriate color
     pygame.draw.rect(screen, BUTTON_HOVER_COLOR if is_hovered else color, button_rect)
     
-    font = pygame.font.Font(None, font_size)
-    text_surface = font.render(text, True, (0, 0, 0))
+    text_surface = render_text(text, font_size, (0, 0, 0))
     text_rect = text_surface.get_rect(center=button_rect.center)
     screen.blit(text_surface, text_rect)
     
@@ -336,9 +749,6 @@ def draw_ui(divisor=None, cell_size=None):
         font_size * 5, 
         font_size * 1.05, BUTTON_COLOR, font_size))
     
-    print(big_text)
-    print(med_text)
-
     return ((big_rect, big_hover, big_text),
             (med_rect, med_hover, med_text),
             (small_rect, small_hover, small_text),
@@ -349,8 +759,7 @@ def draw_ui(divisor=None, cell_size=None):
 
 def draw_reset_text():
     font_size = int(WINDOW_SIZE * 0.036)  # 3.6% of window size
-    font = pygame.font.Font(None, font_size)
-    text = font.render("Press ESC\Enter to Reset", True, (255, 255, 255))
+    text = render_text("Press ESC\Enter to Reset", font_size, (255, 255, 255))
     
     # Position text proportionally to window
     #text_x = int(WINDOW_SIZE * 0.8)  # 80% from left
@@ -378,17 +787,39 @@ def draw_save_button():
     save_button_rect, save_hover, _ = draw_button(screen, "Press 'S' to Save", button_x, button_y, button_width, button_height, BUTTON_COLOR, font_size)
     return save_button_rect, save_hover
 
+def draw_zoom_button():
+    font_size = int(WINDOW_SIZE * 0.036)  # 3.6% of window size
+    button_width = int(WINDOW_SIZE * 0.22)
+    button_height = int(WINDOW_SIZE * 0.05)
+    
+    # Right under the save button
+    button_x = int(WINDOW_SIZE * 0.765)
+    button_y = int(WINDOW_SIZE * 0.51)
+    
+    zoom_button_rect, zoom_hover, _ = draw_button(screen, "Press 'Z' to Zoom", button_x, button_y, button_width, button_height, BUTTON_COLOR, font_size)
+    return zoom_button_rect, zoom_hover
+
+def draw_rainbow_button():
+    font_size = int(WINDOW_SIZE * 0.036)  # 3.6% of window size
+    button_width = int(WINDOW_SIZE * 0.22)
+    button_height = int(WINDOW_SIZE * 0.05)
+    
+    # Under the zoom button
+    button_x = int(WINDOW_SIZE * 0.765)
+    button_y = int(WINDOW_SIZE * 0.57)
+    
+    rainbow_button_rect, rainbow_hover, _ = draw_button(screen, "'R' for Rainbow", button_x, button_y, button_width, button_height, BUTTON_COLOR, font_size)
+    return rainbow_button_rect, rainbow_hover
+
 def draw_divisor_and_rows_text(divisor, rows=None):
     font_size = int(WINDOW_SIZE * 0.036)  # 3.6% of window size
-    font = pygame.font.Font(None, font_size)
-    text = font.render(f"mod: {divisor} , rows: {rows}", True, (255, 255, 255))
+    text = render_text(f"mod: {divisor} , rows: {rows}", font_size, (255, 255, 255))
     text_rect = text.get_rect(center=(WINDOW_SIZE * 0.72, WINDOW_SIZE * 0.065))
     screen.blit(text, text_rect)
     
 def draw_sierpinski_text():
     font_size = int(WINDOW_SIZE * 0.036)  # 3.6% of window size
-    font = pygame.font.Font(None, font_size)
-    text = font.render("~Sierpiński Triangle!", True, (255, 255, 255))
+    text = render_text("~Sierpiński Triangle!", font_size, (255, 255, 255))
     text_rect = text.get_rect(center=(WINDOW_SIZE * 0.72, WINDOW_SIZE * 0.1))  # Position below version
     screen.blit(text, text_rect)
     
@@ -401,14 +832,12 @@ def draw_basad_text():
     # # Load a font that supports Hebrew
     # # Dynamic path to the font file
     # font_path = FILE_DIR / "Arial.ttf"  # Replace with the correct path to a Hebrew-supporting font
-    font = pygame.font.Font(None, 25)
-    
     # # Hebrew text
     # basad = "בס\"ד"
     # hebrew_text = PyHebText(basad)
     
     # Render the text with the appropriate font
-    text = font.render("BS\"D", True, (255, 255, 255))  # White color text
+    text = render_text("BS\"D", 25, (255, 255, 255))  # White color text
     
     # Get the text's rectangle and position it
     text_rect = text.get_rect(center=(WINDOW_SIZE - 50, 30))  # Position near top-right corner
@@ -416,23 +845,42 @@ def draw_basad_text():
     
 def draw_version_and_user():
     """Display the version on the screen."""
-    font = pygame.font.Font(None, 25)
-    
     # Render version
-    version_text = font.render(VERSION, True, (255, 255, 255))
+    version_text = render_text(VERSION, 25, (255, 255, 255))
     version_rect = version_text.get_rect(topleft=(10, 10))  # Top left corner
     screen.blit(version_text, version_rect)
     
      # Render GitHub username
     github_user = f"@{GITHUB_USERNAME}"
-    user_text = font.render(github_user, True, (255, 255, 255))
+    user_text = render_text(github_user, 25, (255, 255, 255))
     user_rect = user_text.get_rect(topleft=(10, 30))  # Position below version
     screen.blit(user_text, user_rect)
+    
+    # Profiling overlay to the right, when the instrumentation is on
+    draw_instrumentation_overlay()
 
 def main():
-    pygame.init()
+    # Only the subsystems the app uses, pygame.init() would also start audio, joysticks, ...
+    pygame.display.init()
+    pygame.font.init()
+    # Starts SDL's timer, pygame.time.get_ticks() stays at 0 until something does
+    pygame.time.wait(0)
     global screen
     
+    instrumentation.enabled = PROFILE_ENABLED
+    instrumentation.register_stats("glyphs", glyph_cache.stats)
+    instrumentation.register_stats("residues", residue_store.stats)
+    instrumentation.register_stats("binomials", residue_cache.stats)
+    instrumentation.register_stats("palettes", lut_cache.stats)
+    
+    if CUSTOM_COLORS:
+        set_custom_colors(parse_colors(CUSTOM_COLORS))
+    
+    # Load and save residue triangles on disk when a directory is configured
+    if RESIDUE_CACHE_DIR:
+        from pascalStore import DiskResidueStore
+        residue_store.disk = DiskResidueStore(RESIDUE_CACHE_DIR)
+    
     # Change appropriate window size
     change_window_size()
     print(WINDOW_SIZE)
@@ -448,7 +896,7 @@ def main():
         
         # Draw UI elements
         buttons = draw_ui()
-        pygame.display.flip()
+        update_display()
         
         # Get divisor input while keeping buttons visible
         while True:
@@ -462,81 +910,72 @@ def main():
                 print("Please enter a valid integer")
         
         # Wait for the user to click a button
-        button_clicked = False
-        while not button_clicked:
-            # Get button states
-            buttons = draw_ui(divisor=divisor)
-            pygame.display.flip()
-            
-            for event in pygame.event.get():
+        clock = pygame.time.Clock()
+        buttons = draw_ui(divisor=divisor)
+        update_display()
+        hovered = hovered_button(buttons, pygame.mouse.get_pos())
+        mode = None
+        while mode is None:
+            for event in wait_for_events(clock):
                 if event.type == pygame.QUIT:
                     pygame.quit()
                     sys.exit()
-                if event.type == pygame.MOUSEBUTTONDOWN:
-                    mouse_pos = pygame.mouse.get_pos()
-                    for rect, hover, text in buttons:
-                        if rect.collidepoint(mouse_pos):
-                            cell_size = BIG_CELL_SIZE
-                            # Determine which button was clicked
-                            if text in CELL_SIZES_AND_ROWS:
-                                cell_size = CELL_SIZES_AND_ROWS[text][0]
-                            
-                            button_clicked = True
-                            
-                            # Clear only triangle area (right side of screen)
-                            pygame.draw.rect(screen, (20, 20, 40), (300, 0, 700, 1000))
-                            draw_basad_text()
-
-                            # Draw triangle
-                            
-                            if text == "Big" or text == "Medium" or text == "Small" or text == "Super Small" or text == "Smallest":
-                                draw_pascals_triangle(screen, divisor, cell_size)
-                                draw_divisor_and_rows_text(divisor, CELL_SIZES_AND_ROWS[text][1])
-                                draw_color_mods(screen, divisor)
-                                
-                                # Check if div=2 for Sierpinski triangle text
-                                if(divisor == 2):
-                                    draw_sierpinski_text()
-                                
-                            elif text == "Primes":
-                                draw_prime_pascal_triangles(screen, divisor, cell_size)
-                                draw_divisor_and_rows_text(divisor, CELL_SIZES_AND_ROWS[text][1])
-                            elif text == "Increasing":
-                                # TODO:
-                                # Show input box to ask for the delay time
-                                #delay_input = get_input("Delay (ms): ", int(WINDOW_SIZE * 0.05), int(WINDOW_SIZE * 0.15))
-                                draw_increasing_pascal_triangles(screen, divisor, cell_size)
-                                draw_divisor_and_rows_text(divisor, CELL_SIZES_AND_ROWS[text][1])
-                            
-                            draw_pascals_triangle(screen, divisor, cell_size)
-                            draw_reset_text()  # Add reset text
-                            pygame.display.flip()
-                            
-                            break
+                if event.type == pygame.MOUSEMOTION and hovered_button(buttons, event.pos) != hovered:
+                    # Only the buttons change with the hover state
+                    hovered = hovered_button(buttons, event.pos)
+                    buttons = draw_ui(divisor=divisor)
+                    update_display([rect for rect, hover, text in buttons])
+                if event.type == pygame.MOUSEBUTTONDOWN and mode is None:
+                    mode = hovered_button(buttons, event.pos)
         
+        # Draw the chosen mode progressively, a click on another button restarts
+        # the render with that mode and ESC/Enter cancels it
+        reset = False
+        while mode is not None:
+            cell_size = mode_cell_size(mode)
+            # The overlay shows the stages of the latest render
+            instrumentation.reset()
+            interrupt = pump_render(iter_mode(mode, divisor, cell_size), buttons=buttons)
+            mode = None
+            if interrupt is None:
+                break
+            if interrupt.type == pygame.MOUSEBUTTONDOWN:
+                mode = hovered_button(buttons, interrupt.pos)
+            elif interrupt.type == pygame.KEYDOWN:
+                reset = True
+        if reset:
+            continue
         
-        
-        # Draw Save button
+        # Draw Save and Zoom buttons
         draw_save_button()
-        pygame.display.flip()
+        draw_zoom_button()
+        draw_rainbow_button()
+        update_display()
 
         # Wait for Enter key or Save
         waiting = True
         while waiting:
-            for event in pygame.event.get():
+            for event in wait_for_events(clock):
                 if event.type == pygame.QUIT:
                     pygame.quit()
                     sys.exit()
                 if event.type == pygame.KEYDOWN and (event.key == pygame.K_RETURN or event.key == pygame.K_ESCAPE):
                     waiting = False
-                    pygame.display.flip()
+                    update_display()
                 elif event.type == pygame.KEYDOWN and event.key == pygame.K_s:
                     save_triangle_as_image(divisor, cell_size)
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_r:
+                    run_rainbow(divisor, cell_size)
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_z:
+                    # Leaving the viewport goes back to the start like a reset
+                    run_viewport(divisor, cell_size)
+                    waiting = False
+                    break
                     
                     
 # Function to save the triangle
-def save_triangle_as_image(divisor, cell_size):
-    """Save the Pascal's Triangle as an image."""
+def render_triangle_surface(divisor, cell_size):
+    """Draw the triangle on an off-screen surface, as it is saved."""
     # Create an off-screen surface
     width, height = WINDOW_SIZE, WINDOW_SIZE  # Adjust dimensions as needed
     save_surface = pygame.Surface((width, height))
@@ -546,6 +985,15 @@ def save_triangle_as_image(divisor, cell_size):
     
     # Draw the Pascal's Triangle on the save_surface
     draw_pascals_triangle(save_surface, divisor, cell_size, show_rem=False)
+    return save_surface
+
+def save_triangle_as_image(divisor, cell_size):
+    """Save the Pascal's Triangle as an image."""
+    save_surface = render_triangle_surface(divisor, cell_size)
+    
+    # Tk is only needed for the file dialog, so it is imported here instead of at startup
+    from tkinter import Tk
+    from tkinter.filedialog import asksaveasfilename
     
     # Initialize Tkinter root window (hidden)
     root = Tk()
@@ -0,0 +1,156 @@
+"""
+Headless batch renderer: writes mod-m Pascal's triangle images without opening a window.
+
+Example:
+    python pascalBatch.py --divisors 2-500 --rows 800 --cell-sizes 1,2 --out gallery
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+# Never open a real window, also on servers without a display
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+BACKGROUND_COLOR = (20, 20, 40)  # Same dark blue-gray as the app
+
+
+def parse_int_list(text):
+    """Parse "2-10,15,20-22" into a sorted list of ints."""
+    values = set()
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            first, last = part.split("-", 1)
+            values.update(range(int(first), int(last) + 1))
+        else:
+            values.add(int(part))
+    return sorted(values)
+
+
+def render_triangle_rgba(divisor, rows, cell_size, background=BACKGROUND_COLOR, tiled=False, workers=None,
+                         scheme="hsv"):
+    """Render one triangle off-screen and return its (height, width, 4) RGBA array."""
+    from pascalPalette import packed_lut
+    from pascalRaster import assemble_tiles, crt_residue_triangle, index_image_to_rgba, triangle_index_image
+
+    if tiled:
+        # Row blocks computed in parallel, for poster-sized triangles
+        image = assemble_tiles(divisor, rows, cell_size, workers=workers)
+    else:
+        # Composite divisors reuse the triangles of their prime powers
+        image, _ = triangle_index_image(crt_residue_triangle(divisor, rows), cell_size)
+    return index_image_to_rgba(image, packed_lut(divisor, scheme, background))
+
+
+def write_png(rgba, path):
+    """Write an RGBA array as a PNG through an off-screen pygame surface."""
+    import pygame
+
+    height, width = rgba.shape[:2]
+    pygame.image.save(pygame.image.frombuffer(rgba, (width, height), "RGBA"), str(path))
+
+
+def write_raw(divisor, rows, path):
+    """Write the residue triangle itself as a .npy array."""
+    import numpy as np
+    from pascalRaster import residue_store
+
+    np.save(path, residue_store.triangle(divisor, rows))
+
+
+def render_batch(divisors, rows_list, cell_sizes, out_dir, raw=False, tiled=False, workers=None, stream=False,
+                 scheme="hsv", verbose=True):
+    """Render every (divisor, rows, cell_size) combination into out_dir, returns the written paths."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    written = []
+    for divisor in divisors:
+        for rows in rows_list:
+            if raw and tiled:
+                # Index images streamed tile by tile into .npy files
+                from pascalRaster import write_tiles_npy
+                paths = [out_dir / f"pascal_mod_{divisor}_rows_{rows}_cell_{cell_size}_index.npy" for cell_size in cell_sizes]
+                for cell_size, path in zip(cell_sizes, paths):
+                    write_tiles_npy(path, divisor, rows, cell_size, workers=workers)
+            elif raw:
+                # Raw residues, one array row per triangle row (cell size does not apply)
+                paths = [out_dir / f"pascal_mod_{divisor}_rows_{rows}.npy"]
+                write_raw(divisor, rows, paths[0])
+            elif stream:
+                # Scanlines encoded as they are computed, O(width) memory
+                from pascalExport import write_triangle_png
+                from pascalPalette import palette_colors
+                from pascalRaster import residue_store
+                # With --store the residue file is written (or extended) first and the scanlines
+                # are read from its mapping, so later runs skip the computation
+                source = residue_store.disk.extend(divisor, rows) if residue_store.disk is not None else None
+                paths = [out_dir / f"pascal_mod_{divisor}_rows_{rows}_cell_{cell_size}.png" for cell_size in cell_sizes]
+                for cell_size, path in zip(cell_sizes, paths):
+                    write_triangle_png(path, divisor, rows, palette_colors(divisor, scheme), cell_size, BACKGROUND_COLOR,
+                                       source=source)
+            else:
+                paths = [out_dir / f"pascal_mod_{divisor}_rows_{rows}_cell_{cell_size}.png" for cell_size in cell_sizes]
+                for cell_size, path in zip(cell_sizes, paths):
+                    write_png(render_triangle_rgba(divisor, rows, cell_size, tiled=tiled, workers=workers,
+                                                   scheme=scheme), path)
+            written.extend(paths)
+            if verbose:
+                print(*paths, sep="\n")
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render Pascal's triangle mod m images without a GUI.")
+    parser.add_argument("--divisors", default="2-10", help='Divisors, e.g. "2-500" or "2,3,5,7"')
+    parser.add_argument("--rows", default="800", help='Row counts, e.g. "97,800"')
+    parser.add_argument("--cell-sizes", default="1", help='Cell sizes in pixels, e.g. "1,2,5"')
+    parser.add_argument("--out", default="pascal_images", help="Output directory")
+    parser.add_argument("--raw", action="store_true", help="Write raw residue arrays (.npy) instead of PNGs")
+    parser.add_argument("--tiled", action="store_true", help="Compute row blocks in parallel (for 10k+ rows)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes for --tiled (default: all cores)")
+    parser.add_argument("--stream", action="store_true",
+                        help="Stream PNG scanlines to disk, memory stays O(width) for any row count")
+    parser.add_argument("--palette", default=None, choices=("hsv", "rainbow", "custom"),
+                        help="Color scheme (default: hsv, or custom when --colors is given)")
+    parser.add_argument("--colors", default="", help='Custom colors for remainders 0, 1, ..., e.g. "ffffff,000000"')
+    parser.add_argument("--store", default=None,
+                        help="Directory of residue files to reuse across runs "
+                             "(with --stream, missing or shorter files are written first)")
+    parser.add_argument("--quiet", action="store_true", help="Do not print written paths")
+    args = parser.parse_args(argv)
+
+    divisors = parse_int_list(args.divisors)
+    if not divisors or divisors[0] < 1:
+        parser.error("divisors must be positive")
+    rows_list = parse_int_list(args.rows)
+    if not rows_list or rows_list[0] < 1:
+        parser.error("rows must be positive")
+    cell_sizes = parse_int_list(args.cell_sizes)
+    if not cell_sizes or cell_sizes[0] < 1:
+        parser.error("cell sizes must be positive")
+    if args.workers is not None and args.workers < 1:
+        parser.error("workers must be positive")
+    scheme = args.palette or ("custom" if args.colors else "hsv")
+    if args.colors:
+        from pascalPalette import parse_colors, set_custom_colors
+        try:
+            set_custom_colors(parse_colors(args.colors))
+        except ValueError as error:
+            parser.error(str(error))
+    if args.store:
+        from pascalRaster import residue_store
+        from pascalStore import DiskResidueStore
+        residue_store.disk = DiskResidueStore(args.store)
+    render_batch(divisors, rows_list, cell_sizes,
+                 args.out, raw=args.raw, tiled=args.tiled, workers=args.workers,
+                 stream=args.stream, scheme=scheme, verbose=not args.quiet)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
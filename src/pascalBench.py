@@ -0,0 +1,250 @@
+"""
+Benchmarks for the residue math and the rendering paths, run without a window.
+
+Every case is timed a few times with cold caches, then run once more under tracemalloc
+for its peak memory. Results are written as JSON, and a previous results file can be
+given as a baseline to catch regressions.
+
+Example:
+    python pascalBench.py --out baseline.json
+    python pascalBench.py --baseline baseline.json --out current.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+# Never open a real window, also on servers without a display
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+# A case regresses when its best time is this much slower than the baseline's
+DEFAULT_TOLERANCE = 0.25
+
+# Draw presets timed by default, Primes and Increasing are timed as sweeps
+DRAW_PRESETS = ("Big", "Medium", "Small", "Super Small", "Smallest")
+
+
+def clear_caches():
+    """Drop every in-memory cache, so each run measures the cold path."""
+    import coloredPascal
+    import pascalMath
+    import pascalPalette
+    import pascalRaster
+    import pascalViewport
+
+    pascalRaster.residue_store.clear()
+    pascalRaster.triangle_layout.cache_clear()
+    pascalRaster._crt_table.cache_clear()
+    pascalMath.residue_cache.clear()
+    pascalMath.unit_factorial_cache.clear()
+    pascalMath.factorize.cache_clear()
+    pascalMath.crt_coefficients.cache_clear()
+    pascalViewport._factorial_tables.cache_clear()
+    pascalViewport._small_binomial_table.cache_clear()
+    pascalPalette.palette_cache.clear()
+    pascalPalette.lut_cache.clear()
+    pascalPalette._hue_wheel.cache_clear()
+    coloredPascal.glyph_cache.clear()
+    coloredPascal.get_font.cache_clear()
+
+
+def measure(function, repeats=3, warm=False):
+    """
+    Time function over repeats runs and record the peak memory of one more run.
+
+    Returns a dict with the best and median time in seconds and the peak traced memory in bytes.
+    """
+    times = []
+    for _ in range(repeats):
+        if not warm:
+            clear_caches()
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    # tracemalloc slows Python code down a lot, so it is kept out of the timed runs
+    if not warm:
+        clear_caches()
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds_min": min(times), "seconds_median": statistics.median(times),
+            "repeats": repeats, "peak_bytes": peak}
+
+
+def _screen():
+    """The app module with a (dummy driver) display surface to draw on."""
+    import pygame
+    import coloredPascal
+
+    if not pygame.display.get_init():
+        pygame.display.init()
+        pygame.font.init()
+    if pygame.display.get_surface() is None:
+        coloredPascal.screen = pygame.display.set_mode((coloredPascal.WINDOW_SIZE, coloredPascal.WINDOW_SIZE))
+    return coloredPascal
+
+
+def bench_binomial_coefficient(rows):
+    """Exact C(n, k) for every cell of the first rows rows (the cell labels)."""
+    import coloredPascal
+    for n in range(rows):
+        for k in range(n + 1):
+            coloredPascal.binomial_coefficient(n, k)
+
+
+def bench_residue_triangle(divisor, rows):
+    from pascalRaster import residue_triangle
+    residue_triangle(divisor, rows)
+
+
+def bench_draw(divisor, preset):
+    app = _screen()
+    app.screen.fill((20, 20, 40))
+    app.draw_pascals_triangle(app.screen, divisor, app.CELL_SIZES_AND_ROWS[preset][0])
+
+
+def bench_save(divisor, preset, directory):
+    """The save path without its file dialog: off-screen render plus PNG encoding."""
+    import pygame
+    app = _screen()
+    surface = app.render_triangle_surface(divisor, app.CELL_SIZES_AND_ROWS[preset][0])
+    pygame.image.save(surface, str(Path(directory) / f"pascal_mod_{divisor}.png"))
+
+
+def bench_sweep(mode, divisor):
+    """The Primes or Increasing sweep up to divisor, without the pauses between frames."""
+    app = _screen()
+    pause = app.pause
+    app.pause = lambda ms: iter(())
+    try:
+        steps = (app.iter_prime_pascal_triangles if mode == "Primes" else app.iter_increasing_pascal_triangles)
+        for _ in steps(app.screen, divisor, app.CELL_SIZES_AND_ROWS[mode][0]):
+            pass
+    finally:
+        app.pause = pause
+
+
+def benchmark_cases(divisors, rows_list, presets, sweep_divisors, directory):
+    """(name, params, function) for every benchmark in the grid."""
+    for rows in rows_list:
+        yield "binomial_coefficient", {"rows": rows}, lambda rows=rows: bench_binomial_coefficient(rows)
+    for divisor in divisors:
+        for rows in rows_list:
+            yield ("residue_triangle", {"divisor": divisor, "rows": rows},
+                   lambda divisor=divisor, rows=rows: bench_residue_triangle(divisor, rows))
+    for divisor in divisors:
+        for preset in presets:
+            yield ("draw_pascals_triangle", {"divisor": divisor, "preset": preset},
+                   lambda divisor=divisor, preset=preset: bench_draw(divisor, preset))
+            yield ("save_triangle_as_image", {"divisor": divisor, "preset": preset},
+                   lambda divisor=divisor, preset=preset: bench_save(divisor, preset, directory))
+    for divisor in sweep_divisors:
+        for mode in ("Primes", "Increasing"):
+            yield (f"{mode.lower()}_sweep", {"divisor": divisor},
+                   lambda mode=mode, divisor=divisor: bench_sweep(mode, divisor))
+
+
+def case_key(result):
+    return result["name"] + json.dumps(result["params"], sort_keys=True)
+
+
+def run_benchmarks(divisors, rows_list, presets=DRAW_PRESETS, sweep_divisors=(), repeats=3, warm=False,
+                   verbose=True):
+    """Run the benchmark grid, returns the results document (see main for its layout)."""
+    import numpy as np
+    import pygame
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for name, params, function in benchmark_cases(divisors, rows_list, presets, sweep_divisors, directory):
+            result = {"name": name, "params": params, **measure(function, repeats, warm)}
+            results.append(result)
+            if verbose:
+                print(f"{name:24} {json.dumps(params):40} {result['seconds_min'] * 1000:10.1f} ms "
+                      f"{result['peak_bytes'] / 2 ** 20:8.1f} MiB")
+    return {
+        "meta": {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "pygame": pygame.version.ver,
+            "repeats": repeats,
+            "warm": warm,
+        },
+        "results": results,
+    }
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Cases that got slower than the baseline by more than tolerance (a fraction).
+
+    Returns a list of (result, baseline_result, ratio); cases missing from either side are skipped.
+    """
+    previous = {case_key(result): result for result in baseline["results"]}
+    regressions = []
+    for result in results["results"]:
+        old = previous.get(case_key(result))
+        if old is None or not old["seconds_min"]:
+            continue
+        ratio = result["seconds_min"] / old["seconds_min"]
+        if ratio > 1 + tolerance:
+            regressions.append((result, old, ratio))
+    return regressions
+
+
+def main(argv=None):
+    from pascalBatch import parse_int_list
+
+    parser = argparse.ArgumentParser(description="Benchmark the residue computation and rendering paths.")
+    parser.add_argument("--divisors", default="2,7,12", help='Divisors, e.g. "2,7,12"')
+    parser.add_argument("--rows", default="100,800", help='Row counts for the residue and label benchmarks')
+    parser.add_argument("--presets", default=",".join(DRAW_PRESETS),
+                        help="CELL_SIZES_AND_ROWS presets to draw and save")
+    parser.add_argument("--sweep", default="12", help='Divisors to run the Primes/Increasing sweeps up to, "" for none')
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per case")
+    parser.add_argument("--warm", action="store_true", help="Keep caches between runs")
+    parser.add_argument("--out", default=None, help="Write the JSON results here (default: stdout)")
+    parser.add_argument("--baseline", default=None, help="Earlier JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed slowdown before a case counts as a regression (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    presets = [preset.strip() for preset in args.presets.split(",") if preset.strip()]
+    unknown = set(presets) - set(DRAW_PRESETS)
+    if unknown:
+        parser.error(f"unknown presets {sorted(unknown)}, choose from {DRAW_PRESETS}")
+    results = run_benchmarks(parse_int_list(args.divisors), parse_int_list(args.rows), presets,
+                             parse_int_list(args.sweep), args.repeats, args.warm, verbose=args.out is not None)
+    if args.out:
+        Path(args.out).write_text(json.dumps(results, indent=2))
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.baseline:
+        regressions = compare(results, json.loads(Path(args.baseline).read_text()), args.tolerance)
+        for result, old, ratio in regressions:
+            print(f"REGRESSION {result['name']} {json.dumps(result['params'])}: "
+                  f"{old['seconds_min'] * 1000:.1f} ms -> {result['seconds_min'] * 1000:.1f} ms ({ratio:.2f}x)",
+                  file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
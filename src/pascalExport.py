@@ -0,0 +1,98 @@
+"""Streaming PNG export: the triangle is computed and encoded one scanline at a time."""
+
+import struct
+import zlib
+
+import numpy as np
+
+from pascalRaster import BACKGROUND_INDEX, palette_lut, residue_dtype
+
+# Compressed bytes collected before an IDAT chunk is written
+IDAT_CHUNK_SIZE = 1 << 16
+
+
+def _write_chunk(file, chunk_type, data):
+    file.write(struct.pack(">I", len(data)))
+    file.write(chunk_type)
+    file.write(data)
+    file.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(chunk_type))))
+
+
+def iter_scanlines(divisor, rows, cell_size=1, source=None):
+    """
+    Yield the palette-indexed scanlines of the triangle, top to bottom.
+
+    Only the current residue row and one scanline are alive, so memory is O(width)
+    no matter how many rows there are. Index 0 is the background, remainder r is r + 1.
+    Rows stored in source (a pascalStore.ResidueFile for divisor) are read as views into
+    its mapping, the rows past it continue with the additive recurrence.
+    """
+    width = rows * cell_size
+    dtype = residue_dtype(divisor)
+    last_left = (-(rows - 1) * cell_size) // 2
+    stored = min(source.rows, rows) if source is not None else 0
+    row = np.zeros(rows, dtype=np.int64)
+    if stored:
+        # Continue the recurrence from the last stored row
+        row[:stored] = source.row(stored - 1)
+        row[1:] = (row[1:] + row[:-1]) % divisor
+    elif rows:
+        row[0] = 1 % divisor
+    for n in range(rows):
+        # Stored rows may use a narrower type than the index image, so the + 1 happens after the cast
+        residues = source.row(n) if n < stored else row[:n + 1]
+        # Same row offsets as pascalRaster.row_offsets
+        left = (-n * cell_size) // 2 - last_left
+        line = np.full(width, BACKGROUND_INDEX, dtype=dtype)
+        line[left:left + (n + 1) * cell_size] = np.repeat(residues.astype(dtype) + 1, cell_size)
+        for _ in range(cell_size):
+            yield line
+        if n >= stored:
+            row[1:] = (row[1:] + row[:-1]) % divisor
+
+
+def write_triangle_png(path, divisor, rows, colors, cell_size=1, background=(20, 20, 40), compress_level=6,
+                       source=None):
+    """
+    Write the mod-divisor triangle as a PNG, streaming scanlines to the encoder.
+
+    Divisors below 256 are written as an indexed (palette) PNG, larger ones as RGB.
+
+    Args:
+        path: Output file path.
+        divisor: Modulus for coloring.
+        rows: Number of triangle rows.
+        colors: Palette for remainders 0..divisor-1 (e.g. from generate_color_palette).
+        cell_size: Size of each cell in pixels.
+        background: Color outside the triangle.
+        compress_level: zlib level, lower is faster.
+        source: Optional pascalStore.ResidueFile to read stored rows from (see iter_scanlines).
+    """
+    width = height = rows * cell_size
+    lut = palette_lut(colors, background)[:, :3]
+    indexed = len(lut) <= 256
+    compressor = zlib.compressobj(compress_level)
+
+    with open(path, "wb") as file:
+        file.write(b"\x89PNG\r\n\x1a\n")
+        color_type = 3 if indexed else 2
+        _write_chunk(file, b"IHDR", struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0))
+        if indexed:
+            _write_chunk(file, b"PLTE", lut.tobytes())
+
+        pending = []
+        pending_size = 0
+        for line in iter_scanlines(divisor, rows, cell_size, source):
+            # Filter type 0 (None) before each scanline
+            pixels = line.astype(np.uint8).tobytes() if indexed else lut[line].tobytes()
+            data = compressor.compress(b"\x00" + pixels)
+            if data:
+                pending.append(data)
+                pending_size += len(data)
+            if pending_size >= IDAT_CHUNK_SIZE:
+                _write_chunk(file, b"IDAT", b"".join(pending))
+                pending, pending_size = [], 0
+        pending.append(compressor.flush())
+        _write_chunk(file, b"IDAT", b"".join(pending))
+        _write_chunk(file, b"IEND", b"")
+    return path
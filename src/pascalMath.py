@@ -0,0 +1,242 @@
+"""
+Residue math for Pascal's triangle. Only the standard library is imported here (no pygame or numpy),
+so scripts that just need residues start quickly.
+"""
+
+import sys
+from array import array
+from collections import OrderedDict
+from functools import lru_cache
+
+
+@lru_cache(maxsize=256)
+def factorize(n):
+    """Return the prime factorization of n as a {prime: exponent} dict."""
+    factors = {}
+    p = 2
+    while p * p <= n:
+        while n % p == 0:
+            factors[p] = factors.get(p, 0) + 1
+            n //= p
+        p += 1
+    if n > 1:
+        factors[n] = factors.get(n, 0) + 1
+    return factors
+
+
+# Largest modulus that gets a lookup table of unit factorials (4 bytes per entry),
+# bigger ones multiply directly, which costs O(modulus) per digit
+TABLE_LIMIT = 1 << 22
+
+
+def _unit_factorials(p, q):
+    """
+    Table of products of 1..i skipping multiples of p, mod q = p**e, as a uint32 array('I').
+    Built once per (p, q) and kept in unit_factorial_cache.
+    """
+    key = (p, q)
+    table = unit_factorial_cache.get(key)
+    if table is None:
+        table = array("I", bytes(4 * q))
+        product = 1
+        for i in range(q):
+            if i % p:
+                product = product * i % q
+            table[i] = product
+        unit_factorial_cache.put(key, table)
+    return table
+
+
+def _unit_product(i, p, q):
+    """Product of 1..i skipping multiples of p, mod q, for i < q."""
+    if q <= TABLE_LIMIT:
+        return _unit_factorials(p, q)[i]
+    result = 1
+    for j in range(2, i + 1):
+        if j % p:
+            result = result * j % q
+    return result
+
+
+def _p_exponent_of_factorial(n, p):
+    """Legendre's formula: exponent of p in n!."""
+    exponent = 0
+    while n:
+        n //= p
+        exponent += n
+    return exponent
+
+
+def _unit_factorial(n, p, q):
+    """n! with every factor of p removed, mod q = p**e."""
+    # Generalized Wilson: the product of all units below q is 1 for 2**e (e >= 3), -1 otherwise
+    block = 1 if p == 2 and q >= 8 else q - 1
+    result = 1
+    while n:
+        result = result * pow(block, n // q, q) * _unit_product(n % q, p, q) % q
+        n //= p
+    return result
+
+
+def binomial_mod_prime(n, k, p):
+    """C(n, k) mod a prime p using Lucas' theorem, O(log_p n)."""
+    if k < 0 or k > n:
+        return 0
+    result = 1
+    while n:
+        n_digit, k_digit = n % p, k % p
+        if k_digit > n_digit:
+            return 0
+        denominator = _unit_product(k_digit, p, p) * _unit_product(n_digit - k_digit, p, p)
+        result = result * _unit_product(n_digit, p, p) * pow(denominator, -1, p) % p
+        n //= p
+        k //= p
+    return result
+
+
+def binomial_mod_prime_power(n, k, p, e):
+    """C(n, k) mod p**e, using Kummer's theorem for the power of p and unit factorials for the rest."""
+    if k < 0 or k > n:
+        return 0
+    q = p ** e
+    # Number of carries when adding k and n-k in base p (Kummer)
+    carries = _p_exponent_of_factorial(n, p) - _p_exponent_of_factorial(k, p) - _p_exponent_of_factorial(n - k, p)
+    if carries >= e:
+        return 0
+    units = _unit_factorial(n, p, q) * pow(_unit_factorial(k, p, q) * _unit_factorial(n - k, p, q), -1, q)
+    return units * p ** carries % q
+
+
+def binomial_mod(n, k, divisor):
+    """
+    C(n, k) mod divisor for arbitrary n, k, without building big integers or earlier rows.
+
+    Prime divisors use Lucas' theorem, prime powers use Kummer's theorem with unit
+    factorials (Granville), and composite divisors are combined with the CRT.
+    """
+    if k < 0 or k > n:
+        return 0
+    if divisor == 1:
+        return 0
+    result = 0
+    for p, e, coefficient in crt_coefficients(divisor):
+        residue = binomial_mod_prime(n, k, p) if e == 1 else binomial_mod_prime_power(n, k, p, e)
+        result += residue * coefficient
+    return result % divisor
+
+
+@lru_cache(maxsize=256)
+def crt_coefficients(divisor):
+    """
+    Chinese Remainder Theorem weights for divisor, as (p, e, coefficient) per prime power p**e.
+
+    A residue r mod divisor is the sum of (r mod p**e) * coefficient over all prime powers, mod divisor.
+    """
+    coefficients = []
+    for p, e in factorize(divisor).items():
+        q = p ** e
+        rest = divisor // q
+        coefficients.append((p, e, rest * pow(rest, -1, q) % divisor))
+    return tuple(coefficients)
+
+
+class LRUCache:
+    """
+    Bounded least-recently-used cache with hit/miss/eviction counters.
+
+    Args:
+        max_entries: Maximum number of entries kept, None for no entry limit.
+        max_bytes: Approximate memory limit (keys + values, via sizeof), None for no limit.
+        sizeof: Function estimating the size of one key or value in bytes.
+    """
+
+    def __init__(self, max_entries=100_000, max_bytes=None, sizeof=sys.getsizeof):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        """Return the cached value for key (marking it recently used), or default."""
+        try:
+            value = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Store value under key, evicting the least recently used entries past the limits."""
+        if key in self._entries:
+            self.bytes -= self._entry_size(key, self._entries.pop(key))
+        self._entries[key] = value
+        self.bytes += self._entry_size(key, value)
+        while self._entries and self._over_limit():
+            old_key, old_value = self._entries.popitem(last=False)
+            self.bytes -= self._entry_size(old_key, old_value)
+            self.evictions += 1
+
+    def clear(self):
+        """Drop every entry, keeping the counters."""
+        self._entries.clear()
+        self.bytes = 0
+
+    def stats(self):
+        """Counters for sizing the cache."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _entry_size(self, key, value):
+        return self.sizeof(key) + self.sizeof(value)
+
+    def _over_limit(self):
+        if self.max_entries is not None and len(self._entries) > self.max_entries:
+            return True
+        return self.max_bytes is not None and self.bytes > self.max_bytes
+
+
+# Residues of single binomials, keyed by (n, k, divisor)
+residue_cache = LRUCache(max_entries=200_000)
+
+# Unit factorial tables by (p, q), bounded by their size (sys.getsizeof counts an array's buffer)
+unit_factorial_cache = LRUCache(max_entries=None, max_bytes=64 * 2 ** 20)
+
+
+def cached_binomial_mod(n, k, divisor):
+    """binomial_mod through the shared, bounded residue_cache."""
+    key = (n, k, divisor)
+    remainder = residue_cache.get(key)
+    if remainder is None:
+        remainder = binomial_mod(n, k, divisor)
+        residue_cache.put(key, remainder)
+    return remainder
+
+
+def residue_row(n, divisor):
+    """
+    Row n of Pascal's triangle mod divisor, computed directly with binomial_mod.
+
+    Lets a caller start the additive recurrence at any row without the rows above it.
+    """
+    half = [binomial_mod(n, k, divisor) for k in range(n // 2 + 1)]
+    # C(n, k) == C(n, n - k)
+    return half + half[:(n + 1) // 2][::-1]
@@ -0,0 +1,167 @@
+"""
+Color palettes for remainders, cached per (divisor, scheme) and kept free of pygame.
+
+Palettes are (divisor, 3) uint8 arrays, remainder r has color palette[r]. Lookup tables
+for rasterized images (see pascalRaster) are packed uint32 arrays with the background
+at index 0 and remainder r at index r + 1, each entry holding R, G, B, A bytes in memory order.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+
+from pascalMath import LRUCache
+
+# "hsv" spreads hues around the whole color wheel (the app's original palette), "rainbow" runs
+# from red to violet in increasing order, "custom" is hsv with user-chosen colors on top
+SCHEMES = ("hsv", "rainbow", "custom")
+
+# Remainder 0 (divisible cells) is black in every scheme
+ZERO_COLOR = (0, 0, 0)
+
+# Hues on the color wheel used for palette cycling, one step per frame
+CYCLE_STEPS = 240
+
+# Custom colors by divisor, the None entry applies to every divisor
+custom_colors = {}
+
+# Palettes and lookup tables keyed by (divisor, scheme) and (divisor, scheme, background)
+palette_cache = LRUCache(max_entries=512)
+lut_cache = LRUCache(max_entries=512)
+
+
+def hue_colors(fractions, degrees=360):
+    """
+    Fully saturated colors with hues at the given fractions of degrees, as an (n, 3) uint8 array.
+
+    Same arithmetic (and truncation) as pygame.Color.hsva, so colors match the ones the app
+    used to build through pygame.Color.
+    """
+    hue = np.asarray(fractions, dtype=np.float64) * degrees / 60
+    sector = np.floor(hue).astype(np.int64) % 6
+    fraction = hue - np.floor(hue)
+    falling = 1 - fraction
+    rising = 1 - (1 - fraction)
+    full, empty = np.ones_like(hue), np.zeros_like(hue)
+    channels = np.choose(sector[None, :], [
+        [full, rising, empty],
+        [falling, full, empty],
+        [empty, full, rising],
+        [empty, falling, full],
+        [rising, empty, full],
+        [full, empty, falling],
+    ])
+    return (channels.T * 255).astype(np.uint8)
+
+
+def parse_colors(text):
+    """Parse "000000,ff8800,#3366cc" into a list of (r, g, b) tuples."""
+    colors = []
+    for part in text.split(","):
+        part = part.strip().lstrip("#")
+        if part:
+            if len(part) != 6:
+                raise ValueError(f"expected a color like ff8800, got {part!r}")
+            colors.append(tuple(bytes.fromhex(part)))
+    return colors
+
+
+def set_custom_colors(colors, divisor=None):
+    """Use colors for remainders 0, 1, ... in the "custom" scheme, for one divisor or (None) all of them."""
+    custom_colors[divisor] = [tuple(color)[:3] for color in colors]
+    # Cheaper than finding the affected entries, palettes are quick to rebuild
+    palette_cache.clear()
+    lut_cache.clear()
+
+
+def color_palette(divisor, scheme="hsv"):
+    """Colors of remainders 0..divisor-1 as a read-only (divisor, 3) uint8 array."""
+    key = (divisor, scheme)
+    palette = palette_cache.get(key)
+    if palette is None:
+        palette = _build_palette(divisor, scheme)
+        palette.flags.writeable = False
+        palette_cache.put(key, palette)
+    return palette
+
+
+def _build_palette(divisor, scheme):
+    if scheme not in SCHEMES:
+        raise ValueError(f"scheme must be one of {SCHEMES}")
+    palette = np.zeros((divisor, 3), dtype=np.uint8)
+    palette[0] = ZERO_COLOR
+    if scheme == "rainbow":
+        # Remainder 1 is red and the largest remainder violet
+        palette[1:] = hue_colors(np.linspace(0, 1, divisor - 1), 270)
+    else:
+        palette[1:] = hue_colors(np.arange(1, divisor) / max(divisor - 1, 1))
+    if scheme == "custom":
+        # Colors for this divisor win over the ones set for every divisor
+        for colors in (custom_colors.get(None, ()), custom_colors.get(divisor, ())):
+            chosen = colors[:divisor]
+            if chosen:
+                palette[:len(chosen)] = chosen
+    return palette
+
+
+def palette_colors(divisor, scheme="hsv"):
+    """Palette as a list of (r, g, b) tuples, for pygame drawing calls."""
+    return [tuple(color) for color in color_palette(divisor, scheme).tolist()]
+
+
+def pack_colors(colors, alpha=255):
+    """Pack (n, 3) colors into uint32 values with R, G, B, A bytes in memory order."""
+    rgba = np.empty((len(colors), 4), dtype=np.uint8)
+    rgba[:, :3] = colors
+    rgba[:, 3] = alpha
+    return rgba.view(np.uint32)[:, 0]
+
+
+def packed_lut(divisor, scheme="hsv", background=None):
+    """
+    Packed uint32 lookup table for index images: index 0 is the background (transparent
+    when None), index r + 1 is remainder r. Cached, so callers must not modify it.
+    """
+    key = (divisor, scheme, None if background is None else tuple(background)[:3])
+    lut = lut_cache.get(key)
+    if lut is None:
+        lut = np.empty(divisor + 1, dtype=np.uint32)
+        lut[1:] = pack_colors(color_palette(divisor, scheme))
+        lut[0] = pack_colors([key[2] or (0, 0, 0)], 0 if background is None else 255)[0]
+        lut.flags.writeable = False
+        lut_cache.put(key, lut)
+    return lut
+
+
+def lut_to_rgba(lut):
+    """(n, 4) uint8 RGBA view of a packed lookup table."""
+    return lut.view(np.uint8).reshape(-1, 4)
+
+
+@lru_cache(maxsize=4)
+def _hue_wheel(steps):
+    wheel = hue_colors(np.arange(steps) / steps)
+    wheel.flags.writeable = False
+    return wheel
+
+
+def cycle_colors(divisor, step, steps=CYCLE_STEPS):
+    """
+    Palette of the rainbow cycling animation at a given step, as a (divisor, 3) uint8 array.
+
+    Remainders sit at evenly spaced positions on a precomputed color wheel that turns one
+    position per step, so every frame is a lookup and nothing is converted from HSV again.
+    Remainder 0 stays black.
+    """
+    positions = np.arange(divisor) * steps // max(divisor, 1)
+    palette = _hue_wheel(steps)[(positions + step) % steps]
+    palette[0] = ZERO_COLOR
+    return palette
+
+
+def cycle_lut(divisor, step, background=None, steps=CYCLE_STEPS):
+    """Packed lookup table of cycle_colors, with the background at index 0 like packed_lut."""
+    lut = np.empty(divisor + 1, dtype=np.uint32)
+    lut[1:] = pack_colors(cycle_colors(divisor, step, steps))
+    lut[0] = pack_colors([background or (0, 0, 0)], 0 if background is None else 255)[0]
+    return lut
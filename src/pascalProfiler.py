@@ -0,0 +1,119 @@
+"""
+Opt-in instrumentation: per-stage timers, counters, cache statistics and cProfile captures.
+
+Nothing is recorded until the instrumentation is enabled, so the hooks in the render paths
+cost one attribute check when it is off. cProfile is only imported when a capture starts.
+"""
+
+import json
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+
+
+class Instrumentation:
+    """
+    Stage timings (total/calls/max seconds per stage name), event counters and
+    registered cache statistics, with an optional cProfile capture on top.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.timings = {}
+        self.counters = Counter()
+        self._stats_sources = {}
+        self._profile = None
+        self._last_profile = None
+
+    def stage(self, name):
+        """Context manager timing the code inside it under name."""
+        if not self.enabled:
+            return nullcontext()
+        return self._timed(name)
+
+    @contextmanager
+    def _timed(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            total, calls, longest = self.timings.get(name, (0.0, 0, 0.0))
+            self.timings[name] = (total + elapsed, calls + 1, max(longest, elapsed))
+
+    def count(self, name, amount=1):
+        if self.enabled:
+            self.counters[name] += amount
+
+    def register_stats(self, name, stats):
+        """Add a source of counters (e.g. LRUCache.stats) to every snapshot."""
+        self._stats_sources[name] = stats
+
+    def reset(self):
+        self.timings.clear()
+        self.counters.clear()
+
+    @property
+    def profiling(self):
+        return self._profile is not None
+
+    def start_profile(self):
+        """Start a cProfile capture (enables the instrumentation too)."""
+        self.enabled = True
+        if self._profile is None:
+            import cProfile
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+    def stop_profile(self):
+        """Stop the cProfile capture, it is kept for the next dump."""
+        if self._profile is not None:
+            self._profile.disable()
+            self._last_profile, self._profile = self._profile, None
+
+    def snapshot(self):
+        """Everything recorded so far as a JSON-friendly dict."""
+        return {
+            "stages": {name: {"seconds": total, "calls": calls, "max_seconds": longest}
+                       for name, (total, calls, longest) in sorted(self.timings.items())},
+            "counters": dict(self.counters),
+            "caches": {name: stats() for name, stats in self._stats_sources.items()},
+        }
+
+    def summary_lines(self):
+        """Short text lines for an on-screen overlay."""
+        stages = "  ".join(f"{name} {total * 1000:.0f}ms" for name, (total, calls, _) in self.timings.items())
+        counters = "  ".join(f"{name} {value}" for name, value in self.counters.items())
+        caches = "  ".join(f"{name} {stats()['hit_rate']:.0%}" for name, stats in self._stats_sources.items())
+        return [stages or "no stages timed yet", counters or "no counters yet", f"cache hits: {caches}"]
+
+    def dump(self, directory="."):
+        """
+        Write the snapshot as JSON (plus the cProfile capture as .prof and a text report,
+        when there is one) into directory, returns the written paths.
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        stem = directory / f"pascal_profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        paths = [stem.with_suffix(".json")]
+        paths[0].write_text(json.dumps(self.snapshot(), indent=2))
+
+        profile = self._profile or self._last_profile
+        if profile is not None:
+            if profile is self._profile:
+                profile.disable()
+            paths.append(stem.with_suffix(".prof"))
+            profile.dump_stats(paths[-1])
+            paths.append(stem.with_suffix(".txt"))
+            import pstats
+            with open(paths[-1], "w") as report:
+                pstats.Stats(profile, stream=report).sort_stats("cumulative").print_stats(40)
+            if profile is self._profile:
+                profile.enable()
+        return paths
+
+
+# Shared instance used by the app
+instrumentation = Instrumentation()
@@ -0,0 +1,442 @@
+"""Vectorized rasterizing of Pascal's triangle residues into palette-indexed pixel arrays."""
+
+import os
+from collections import deque
+from functools import lru_cache
+
+import numpy as np
+
+from pascalMath import LRUCache, crt_coefficients, factorize, residue_row
+
+# Index 0 of every rasterized image is the (transparent) background,
+# remainder r is stored as index r + 1
+BACKGROUND_INDEX = 0
+
+# Largest divisor combined from its prime powers through a lookup table (one entry per residue),
+# bigger divisors use a multiply-add per factor instead
+CRT_TABLE_LIMIT = 1 << 16
+
+# Residue rows per tile of the tiled renderer (see tile_rows)
+TILE_ROWS = 256
+
+
+def residue_dtype(divisor):
+    """Smallest unsigned integer type that can hold remainders 0..divisor-1 plus the background index."""
+    if divisor < 2 ** 8:
+        return np.uint8
+    if divisor < 2 ** 16:
+        return np.uint16
+    return np.uint32
+
+
+def is_prime_divisor(divisor):
+    return factorize(divisor) == {divisor: 1}
+
+
+def fractal_residue_rows(p, first_row, last_row):
+    """
+    Rows first_row..last_row-1 of the triangle mod a prime p as a (last_row - first_row, last_row) array.
+
+    By Lucas' theorem the rows a*s..(a+1)*s-1 (s a power of p) are made of copies of the
+    s-row block scaled by C(a, b) mod p, so every level is composed from the one below
+    with array copies (and a table lookup for factors other than 1) instead of per-cell sums.
+    """
+    dtype = residue_dtype(p)
+    if last_row <= p:
+        return residue_triangle_by_rows(p, last_row)[first_row:last_row]
+    size = p
+    while size * p < last_row:
+        size *= p
+    # Digit binomials C(a, b) mod p for the top level, and products c * r mod p for scaling blocks
+    top = residue_triangle_by_rows(p, p)
+    products = (np.arange(p)[:, None] * np.arange(p)[None, :] % p).astype(dtype)
+
+    out = np.zeros((last_row - first_row, last_row), dtype=dtype)
+    full_block = None
+    for a in range(first_row // size, -(-last_row // size)):
+        low, high = max(first_row, a * size), min(last_row, (a + 1) * size)
+        if low == a * size and high == (a + 1) * size:
+            # Whole levels repeat in every block row, build them once
+            if full_block is None:
+                full_block = fractal_residue_rows(p, 0, size)
+            block = full_block
+        else:
+            block = fractal_residue_rows(p, low - a * size, high - a * size)
+        width = block.shape[1]
+        for b in range(a + 1):
+            factor = top[a, b]
+            if factor == 1:
+                out[low - first_row:high - first_row, b * size:b * size + width] = block
+            elif factor:
+                out[low - first_row:high - first_row, b * size:b * size + width] = products[factor][block]
+    return out
+
+
+def residue_triangle(divisor, rows, prefix=None):
+    """
+    Compute rows 0..rows-1 of Pascal's triangle mod divisor as a (rows, rows) array.
+
+    Row n holds C(n, k) mod divisor in columns 0..n, one vectorized recurrence step per row.
+    Columns past n are zero and lie outside the triangle.
+
+    Args:
+        divisor: Modulus for the residues.
+        rows: Number of rows to compute.
+        prefix: Optional earlier result for the same divisor, its rows are copied instead of recomputed.
+    """
+    if rows > divisor and is_prime_divisor(divisor):
+        # Composing copies of smaller levels beats the recurrence, only rows past the prefix are composed
+        done = 0 if prefix is None else min(len(prefix), rows)
+        if not done:
+            return fractal_residue_rows(divisor, 0, rows)
+        triangle = np.zeros((rows, rows), dtype=residue_dtype(divisor))
+        triangle[:done, :done] = prefix[:done, :done]
+        triangle[done:] = fractal_residue_rows(divisor, done, rows)
+        return triangle
+    return residue_triangle_by_rows(divisor, rows, prefix)
+
+
+def residue_triangle_by_rows(divisor, rows, prefix=None):
+    """residue_triangle computed with one vectorized recurrence step per row, for any divisor."""
+    triangle = np.zeros((rows, rows), dtype=residue_dtype(divisor))
+    row = np.zeros(rows, dtype=np.int64)
+    done = 0
+    if prefix is not None and len(prefix) and rows:
+        done = min(len(prefix), rows)
+        triangle[:done, :done] = prefix[:done, :done]
+        row[:done] = prefix[done - 1, :done]
+        row[1:] = (row[1:] + row[:-1]) % divisor
+    elif rows:
+        row[0] = 1 % divisor
+    for n in range(done, rows):
+        triangle[n] = row
+        # C(n+1, k) = C(n, k) + C(n, k-1), the right side is evaluated before assignment
+        row[1:] = (row[1:] + row[:-1]) % divisor
+    return triangle
+
+
+class ResidueStore:
+    """
+    Per-divisor residue triangles that are extended lazily and reused between renders.
+
+    Asking for 800 rows when 97 are stored only computes rows 97..799.
+    Least recently used divisors are dropped once max_bytes is exceeded.
+    With a disk store (pascalStore.DiskResidueStore) attached, triangles are also
+    loaded from and saved to residue files, so they survive restarts.
+    """
+
+    def __init__(self, max_bytes=256 * 2 ** 20, disk=None):
+        self.disk = disk
+        self._triangles = LRUCache(max_entries=None, max_bytes=max_bytes,
+                                   sizeof=lambda item: getattr(item, "nbytes", 0))
+
+    def triangle(self, divisor, rows):
+        """Rows 0..rows-1 mod divisor as a (rows, rows) array (a view into the stored triangle)."""
+        stored = self._triangles.get(divisor)
+        if stored is None or len(stored) < rows:
+            stored = self._extend(divisor, rows, stored)
+            self._triangles.put(divisor, stored)
+        return stored[:rows, :rows]
+
+    def _extend(self, divisor, rows, stored):
+        """Grow stored to rows, loading from the disk store first and computing only what is missing."""
+        on_disk = self.disk.open(divisor) if self.disk is not None else None
+        if on_disk is not None and on_disk.rows > (0 if stored is None else len(stored)):
+            stored = on_disk.triangle(rows)
+        if stored is None or len(stored) < rows:
+            stored = residue_triangle(divisor, rows, prefix=stored)
+            if self.disk is not None:
+                self.disk.save(divisor, stored)
+        return stored
+
+    def row(self, divisor, n):
+        """Residues of row n if it is already computed (in memory or on disk), otherwise None."""
+        stored = self._triangles.get(divisor)
+        if stored is not None and n < len(stored):
+            return stored[n, :n + 1]
+        on_disk = self.disk.open(divisor) if self.disk is not None else None
+        if on_disk is not None and n < on_disk.rows:
+            return on_disk.row(n)
+        return None
+
+    def clear(self):
+        """Drop the triangles kept in memory (files of the disk store stay)."""
+        self._triangles.clear()
+
+    def stats(self):
+        """Counters of the underlying LRUCache."""
+        return self._triangles.stats()
+
+
+# Shared store used by the renderers
+residue_store = ResidueStore()
+
+
+def row_offsets(rows, cell_size):
+    """Left pixel of each row, relative to the left edge of the last (widest) row."""
+    n = np.arange(rows)
+    # Same truncation pygame applies to x = start_x + (k - n / 2) * cell_size
+    lefts = np.floor(-n * cell_size / 2).astype(np.int64)
+    return lefts - lefts[-1], int(lefts[-1])
+
+
+def triangle_index_image(residues, cell_size):
+    """
+    Lay out a residue triangle as a palette-indexed pixel array.
+
+    Args:
+        residues: (rows, rows) array from residue_triangle.
+        cell_size: Size of each cell in pixels.
+
+    Returns:
+        (image, origin_x): image is a (height, width) array with BACKGROUND_INDEX
+        outside the triangle and remainder + 1 inside. origin_x is the pixel offset
+        of the image's left edge from the triangle's center column.
+    """
+    rows = residues.shape[0]
+    return index_image_rows(residues, 0, rows, cell_size), row_offsets(rows, cell_size)[1]
+
+
+def index_image_rows(block, first_row, rows, cell_size):
+    """
+    Pixel lines of a palette-indexed image for a block of residue rows.
+
+    Args:
+        block: Array whose i-th row holds the residues of triangle row first_row + i.
+        first_row: Triangle row of the block's first row.
+        rows: Total number of rows in the triangle (sets the image width and row offsets).
+        cell_size: Size of each cell in pixels.
+    """
+    offsets, _ = row_offsets(rows, cell_size)
+    width = rows * cell_size
+
+    # Build one pixel line per row of cells, then stretch it to the cell height
+    n = np.arange(first_row, first_row + len(block))[:, None]
+    pixel_k = np.arange(width)[None, :] - offsets[n]
+    inside = (pixel_k >= 0) & (pixel_k < (n + 1) * cell_size)
+    k = np.clip(pixel_k // cell_size, 0, block.shape[1] - 1)
+
+    # residue_dtype leaves room for the + 1 shift
+    image = block[n - first_row, k] + 1
+    image[~inside] = BACKGROUND_INDEX
+    if cell_size > 1:
+        image = np.repeat(image, cell_size, axis=0)
+    return image
+
+
+def palette_lut(colors, background=None):
+    """
+    Build an RGBA lookup table with colors[r] at index r + 1.
+
+    Index 0 is transparent, or the opaque background color when one is given.
+    """
+    lut = np.zeros((len(colors) + 1, 4), dtype=np.uint8)
+    if background is not None:
+        lut[0] = (*tuple(background)[:3], 255)
+    for i, color in enumerate(colors, start=1):
+        lut[i, :3] = tuple(color)[:3]
+        lut[i, 3] = 255
+    return lut
+
+
+def index_image_to_rgba(image, lut):
+    """
+    Map a palette-indexed image through the LUT in a single vectorized lookup.
+
+    lut is either an (n, 4) RGBA array from palette_lut or a packed uint32 table
+    from pascalPalette.packed_lut (one 4-byte gather per pixel).
+    """
+    if lut.dtype == np.uint32:
+        return lut[image].view(np.uint8).reshape(*image.shape, 4)
+    return np.ascontiguousarray(lut[image])
+
+
+@lru_cache(maxsize=64)
+def _crt_table(divisor):
+    """
+    Residue mod divisor for every mixed-radix index r1 * (q2 * q3 ...) + r2 * (q3 ...) + ... + rk,
+    where r_i is the residue mod the i-th prime power q_i of divisor.
+    """
+    factors = crt_coefficients(divisor)
+    index = np.arange(divisor, dtype=np.int64)
+    table = np.zeros(divisor, dtype=np.int64)
+    for p, e, coefficient in reversed(factors):
+        index, residue = np.divmod(index, p ** e)
+        table = (table + residue * coefficient) % divisor
+    table = table.astype(residue_dtype(divisor))
+    table.flags.writeable = False
+    return table
+
+
+def crt_residue_triangle(divisor, rows, store=None):
+    """
+    residue_triangle for any divisor, assembled from the triangles of its prime powers.
+
+    The prime-power triangles come from store (the shared residue_store by default), so a
+    sweep over many divisors computes each of them once. Combining them by the Chinese
+    Remainder Theorem takes a multiply-add per factor in small integers plus one table lookup
+    for divisors up to CRT_TABLE_LIMIT, and a multiply-add mod divisor per factor above it.
+    """
+    store = store or residue_store
+    factors = crt_coefficients(divisor)
+    if len(factors) <= 1 or divisor >= 2 ** 31:
+        # Products of residues and coefficients would not fit int64 above 2**31
+        return store.triangle(divisor, rows)
+    if divisor > CRT_TABLE_LIMIT:
+        result = np.zeros((rows, rows), dtype=np.int64)
+        for p, e, coefficient in factors:
+            result += store.triangle(p ** e, rows) * np.int64(coefficient) % divisor
+            result %= divisor
+        return result.astype(residue_dtype(divisor))
+    # The mixed-radix index stays below divisor, so it fits the divisor's own dtype
+    index = np.zeros((rows, rows), dtype=residue_dtype(divisor))
+    for p, e, _ in factors:
+        index *= p ** e
+        index += store.triangle(p ** e, rows)
+    return _crt_table(divisor)[index]
+
+
+@lru_cache(maxsize=8)
+def triangle_layout(rows, cell_size):
+    """
+    Pixel layout of a rows-row triangle image, shared by every divisor.
+
+    Returns (layout, origin_x): layout holds 1 + n * rows + k for the pixels of cell (n, k)
+    and 0 outside the triangle, so an index image is a single lookup (see layout_index_image).
+    """
+    offsets, origin_x = row_offsets(rows, cell_size)
+    n = np.arange(rows)[:, None]
+    pixel_k = np.arange(rows * cell_size)[None, :] - offsets[:, None]
+    inside = (pixel_k >= 0) & (pixel_k < (n + 1) * cell_size)
+    dtype = np.int32 if rows * rows < 2 ** 31 else np.int64
+    layout = np.where(inside, 1 + n * rows + pixel_k // cell_size, 0).astype(dtype)
+    layout = np.repeat(layout, cell_size, axis=0)
+    layout.flags.writeable = False
+    return layout, origin_x
+
+
+def layout_index_image(residues, layout):
+    """triangle_index_image's image for a (rows, rows) residue triangle, through a precomputed layout."""
+    lookup = np.empty(residues.size + 1, dtype=residues.dtype)
+    lookup[0] = BACKGROUND_INDEX
+    # residue_dtype leaves room for the + 1 shift
+    np.add(residues.reshape(-1), 1, out=lookup[1:], casting="unsafe")
+    return lookup[layout]
+
+
+def iter_crt_index_frames(divisors, rows, cell_size, store=None):
+    """
+    Palette-indexed frames (divisor, image, origin_x) for many divisors, from shared prime-power triangles.
+
+    Every prime power is computed once (crt_residue_triangle) and every frame is a single lookup
+    through the shared layout, so a sweep over 2..N costs about one triangle per prime power
+    plus a few array passes per divisor.
+    """
+    layout, origin_x = triangle_layout(rows, cell_size)
+    for divisor in divisors:
+        yield divisor, layout_index_image(crt_residue_triangle(divisor, rows, store), layout), origin_x
+
+
+def seed_row(n, divisor):
+    """
+    Row n mod divisor as an int64 array, looked up directly without the rows above it.
+
+    Uses the vectorized pascalViewport.binomial_mod_array when it supports divisor, which is
+    several times faster than the scalar residue_row.
+    """
+    # Imported here, pascalViewport itself imports this module
+    from pascalViewport import binomial_mod_array, supports_divisor
+
+    if not supports_divisor(divisor):
+        return np.array(residue_row(n, divisor), dtype=np.int64)
+    half = binomial_mod_array(n, np.arange(n // 2 + 1), divisor)
+    # C(n, k) == C(n, n - k)
+    return np.concatenate([half, half[:(n + 1) // 2][::-1]])
+
+
+def residue_block(divisor, first_row, last_row):
+    """
+    Residue rows first_row..last_row-1 as a (last_row - first_row, last_row) array.
+
+    The first row is seeded directly with seed_row, so blocks do not depend on each other.
+    Prime divisors are composed from smaller levels instead (see fractal_residue_rows).
+    """
+    if is_prime_divisor(divisor):
+        return fractal_residue_rows(divisor, first_row, last_row)
+    block = np.zeros((last_row - first_row, last_row), dtype=residue_dtype(divisor))
+    row = np.zeros(last_row, dtype=np.int64)
+    row[:first_row + 1] = seed_row(first_row, divisor)
+    for i in range(last_row - first_row):
+        block[i] = row
+        row[1:] = (row[1:] + row[:-1]) % divisor
+    return block
+
+
+def render_tile(divisor, first_row, last_row, rows, cell_size):
+    """Compute one row block of a rows-row triangle as index image lines, returns (first_row, image)."""
+    return first_row, index_image_rows(residue_block(divisor, first_row, last_row), first_row, rows, cell_size)
+
+
+def tile_rows(rows):
+    """
+    Rows per tile. Seeding a tile's first row costs about as much as a few dozen recurrence
+    steps, so tiles are TILE_ROWS rows high whatever their pixel size, which keeps the seeding
+    a small share of the work. A tile's index image is TILE_ROWS * cell_size lines of the full width.
+    """
+    return max(1, min(rows, TILE_ROWS))
+
+
+def iter_tiles(divisor, rows, cell_size=1, block_rows=None, workers=None):
+    """
+    Compute a (possibly huge) triangle as row-block tiles across a process pool.
+
+    Yields (first_row, image) in row order, where image holds the index image lines
+    of that block. Only a bounded number of tiles is in flight at once, so memory
+    stays proportional to the tile size rather than to the whole triangle.
+    """
+    block_rows = block_rows or tile_rows(rows)
+    starts = range(0, rows, block_rows)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for first_row in starts:
+            yield render_tile(divisor, first_row, min(first_row + block_rows, rows), rows, cell_size)
+        return
+    from concurrent.futures import ProcessPoolExecutor
+
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        in_flight = deque()
+        max_in_flight = 2 * workers
+        for first_row in starts:
+            in_flight.append(pool.submit(render_tile, divisor, first_row,
+                                         min(first_row + block_rows, rows), rows, cell_size))
+            if len(in_flight) >= max_in_flight:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def assemble_tiles(divisor, rows, cell_size=1, out=None, **tile_options):
+    """
+    Assemble all tiles into one (height, width) index image.
+
+    Pass out (e.g. a memory-mapped array from np.lib.format.open_memmap) to stream
+    the tiles straight to disk instead of keeping the image in memory.
+    """
+    size = rows * cell_size
+    if out is None:
+        out = np.zeros((size, size), dtype=residue_dtype(divisor))
+    for first_row, image in iter_tiles(divisor, rows, cell_size, **tile_options):
+        out[first_row * cell_size:first_row * cell_size + len(image)] = image
+    return out
+
+
+def write_tiles_npy(path, divisor, rows, cell_size=1, **tile_options):
+    """Stream a tiled triangle's index image into a .npy file on disk."""
+    size = rows * cell_size
+    out = np.lib.format.open_memmap(path, mode="w+", dtype=residue_dtype(divisor), shape=(size, size))
+    assemble_tiles(divisor, rows, cell_size, out=out, **tile_options)
+    out.flush()
+    return path
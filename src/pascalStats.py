@@ -0,0 +1,436 @@
+"""
+Residue statistics of Pascal's triangle without rendering or building the triangle.
+
+Closed forms are used where they exist:
+    - primes: Lucas' theorem makes every row's residue distribution a product over the base-p
+      digits of n, so counts over rows 0..R-1 follow from a digit walk over R
+      (products of residues become sums of discrete logarithms, i.e. cyclic convolutions)
+    - prime powers p**e: Kummer's theorem counts the entries divisible by p**e through the
+      number of carries when adding k and n-k in base p, counted with a digit DP
+Everything else is accumulated row by row with the additive recurrence, in O(rows) memory.
+
+Streaming costs O(rows**2) time, so the CLI refuses it above STREAMED_ROWS_LIMIT rows unless
+--max-streamed-rows says otherwise.
+
+Example:
+    python pascalStats.py --divisors 2,3,4,5,7,8,9 --rows 1000000
+    python pascalStats.py --divisors 7 --rows 1000000 --counts --json
+"""
+
+import argparse
+import json
+import sys
+from functools import lru_cache
+
+import numpy as np
+
+from pascalMath import factorize
+
+# Most rows the CLI streams by default (a few seconds per divisor)
+STREAMED_ROWS_LIMIT = 20_000
+
+# Largest prime counted in closed form, the digit convolutions cost O(p**2) each
+PRIME_COUNTS_LIMIT = 1 << 12
+
+# Most entries of a single row the CLI looks up one by one by default (about a second per divisor)
+ROW_LOOKUPS_LIMIT = 1_000_000
+
+# Largest divisor --counts lists every residue of
+COUNTS_DIVISOR_LIMIT = 1 << 16
+
+# Residue counts are int64, which holds the number of entries of up to 2**32 - 1 rows
+EXACT_ROWS_LIMIT = 2 ** 32
+
+
+def cell_count(rows):
+    """Number of entries in rows 0..rows-1."""
+    return rows * (rows + 1) // 2
+
+
+def _digits(n, p):
+    """Base-p digits of n, least significant first (empty for 0)."""
+    digits = []
+    while n:
+        n, digit = divmod(n, p)
+        digits.append(digit)
+    return digits
+
+
+@lru_cache(maxsize=64)
+def _primitive_root(p):
+    if p == 2:
+        return 1
+    prime_factors = factorize(p - 1)
+    for g in range(2, p):
+        if all(pow(g, (p - 1) // q, p) != 1 for q in prime_factors):
+            return g
+    raise ValueError(f"{p} is not prime")
+
+
+@lru_cache(maxsize=16)
+def _log_factorials(p):
+    """Discrete logs (base a primitive root) of a! mod p for every a < p, as an int64 array."""
+    g = _primitive_root(p)
+    log = np.zeros(p, dtype=np.int64)
+    power = 1
+    for i in range(p - 1):
+        log[power] = i
+        power = power * g % p
+    log_factorials = np.cumsum(log) % max(p - 1, 1)
+    log_factorials.flags.writeable = False
+    return log_factorials
+
+
+def _digit_distribution(p, digit):
+    """
+    How often each discrete log occurs among C(digit, b) mod p for b = 0..digit, as a (p - 1,)
+    int64 array. These binomials are never 0 mod p, log C(a, b) = log a! - log b! - log (a-b)!.
+    """
+    log_factorials = _log_factorials(p)
+    logs = (log_factorials[digit] - log_factorials[:digit + 1] - log_factorials[digit::-1]) % (p - 1)
+    return np.bincount(logs, minlength=p - 1)
+
+
+def _digit_distribution_sums(p, digits):
+    """Sums of _digit_distribution over digits 0..d, for every d in digits, accumulated in one pass."""
+    sums = {}
+    total = np.zeros(p - 1, dtype=np.int64)
+    for digit in range(max(digits, default=-1) + 1):
+        total += _digit_distribution(p, digit)
+        if digit in digits:
+            sums[digit] = total.copy()
+    return sums
+
+
+def _cyclic_convolve(x, y):
+    """Exact cyclic convolution of two int64 count vectors of the same length."""
+    full = np.convolve(x, y)
+    result = full[:len(x)].copy()
+    result[:len(full) - len(x)] += full[len(x):]
+    return result
+
+
+def _logs_to_residues(p, log_counts, total):
+    """Counts per discrete log -> counts per residue 0..p-1, zeros are whatever is left of total."""
+    g = _primitive_root(p)
+    counts = np.zeros(p, dtype=np.int64)
+    power = 1
+    for count in log_counts:
+        counts[power % p] += count
+        power = power * g % p
+    counts[0] = total - counts[1:].sum()
+    return counts
+
+
+def prime_residue_counts(p, rows):
+    """
+    Count of each residue mod a prime p over rows 0..rows-1, from the base-p digits of rows.
+
+    Rows are split by their highest digit that differs from rows - 1's prefix: all rows sharing a
+    prefix with a smaller digit after it have the prefix's distribution times the digit's,
+    times the sum over every possible digit for each remaining lower position.
+    Costs O(p**2) time and O(p) memory per digit (see PRIME_COUNTS_LIMIT), counts stay exact
+    in int64 for rows below EXACT_ROWS_LIMIT.
+    """
+    if rows >= EXACT_ROWS_LIMIT:
+        raise ValueError(f"residue counts overflow int64 from {EXACT_ROWS_LIMIT} rows on")
+    order = p - 1
+    identity = np.zeros(order, dtype=np.int64)
+    identity[0] = 1
+    digits = _digits(rows, p)
+    # below[d] sums the distributions of digits 0..d, the sum over all digits is needed for lower positions
+    wanted = {digit - 1 for digit in digits if digit}
+    if len(digits) > 1:
+        wanted.add(p - 1)
+    below = _digit_distribution_sums(p, wanted)
+
+    # every_digit ** i, for the free lower positions
+    powers = [identity]
+    for _ in range(len(digits) - 1):
+        powers.append(_cyclic_convolve(powers[-1], below[p - 1]))
+
+    prefix = identity
+    total = np.zeros(order, dtype=np.int64)
+    for position in range(len(digits) - 1, -1, -1):
+        digit = digits[position]
+        if digit:
+            total += _cyclic_convolve(_cyclic_convolve(prefix, below[digit - 1]), powers[position])
+        prefix = _cyclic_convolve(prefix, _digit_distribution(p, digit))
+    return _logs_to_residues(p, total, cell_count(rows))
+
+
+def prime_row_residue_counts(n, p):
+    """Count of each residue mod a prime p in row n, the product (convolution) over n's digits."""
+    counts = np.zeros(p - 1, dtype=np.int64)
+    counts[0] = 1
+    for digit in _digits(n, p):
+        counts = _cyclic_convolve(counts, _digit_distribution(p, digit))
+    return _logs_to_residues(p, counts, n + 1)
+
+
+def _pair_sums(p):
+    """Number of digit pairs (x, y), x, y < p, with x + y == t, for t = 0..2p-2."""
+    t = np.arange(2 * p - 1)
+    return np.minimum(t, 2 * p - 2 - t) + 1
+
+
+def carry_counts(p, rows, limit):
+    """
+    Entries of rows 0..rows-1 by the number of carries when adding k and n-k in base p
+    (the exponent of p in C(n, k), Kummer). Returns a list of limit + 1 counts, the last one
+    for limit or more carries, so its value is the number of entries divisible by p**limit.
+
+    Digit DP over (k, n-k) from the least significant digit, tracking the carry, the capped
+    carry count and how the digits of n seen so far compare to those of rows.
+    """
+    pair_sums = _pair_sums(p)
+    # (carry, carries, comparison of n's low digits with rows': 0 less, 1 equal, 2 greater) -> count
+    states = {(0, 0, 1): 1}
+    for row_digit in _digits(rows, p):
+        # For an incoming carry, weight of every (outgoing carry, comparison of this digit)
+        weights = {}
+        for carry in (0, 1):
+            sums = np.arange(2 * p - 1) + carry
+            digit, carry_out = sums % p, sums // p
+            classes = np.where(digit < row_digit, 0, np.where(digit == row_digit, 1, 2))
+            weights[carry] = [[int(pair_sums[(carry_out == out) & (classes == c)].sum()) for c in range(3)]
+                              for out in (0, 1)]
+        next_states = {}
+        for (carry, carries, compare), count in states.items():
+            for carry_out in (0, 1):
+                for digit_class in range(3):
+                    weight = weights[carry][carry_out][digit_class]
+                    if weight:
+                        # The highest digit decides the comparison, equal digits keep the lower ones' result
+                        key = (carry_out, min(carries + carry_out, limit), compare if digit_class == 1 else digit_class)
+                        next_states[key] = next_states.get(key, 0) + count * weight
+        states = next_states
+    counts = [0] * (limit + 1)
+    for (carry, carries, compare), count in states.items():
+        # n = k + (n-k) must not overflow past rows' digits, and must stay below rows
+        if carry == 0 and compare == 0:
+            counts[carries] += count
+    return counts
+
+
+def row_carry_counts(n, p, limit):
+    """carry_counts for the single row n: entries C(n, k) by carries, the last count for limit or more."""
+    states = {(0, 0): 1}
+    for digit in _digits(n, p):
+        next_states = {}
+        for (carry, carries), count in states.items():
+            for carry_out in (0, 1):
+                # k_i + (n-k)_i + carry == digit + p * carry_out, with both digits below p
+                t = digit + p * carry_out - carry
+                choices = max(0, min(t, p - 1) - max(0, t - p + 1) + 1)
+                if choices:
+                    key = (carry_out, min(carries + carry_out, limit))
+                    next_states[key] = next_states.get(key, 0) + count * choices
+        states = next_states
+    counts = [0] * (limit + 1)
+    for (carry, carries), count in states.items():
+        if carry == 0:
+            counts[carries] += count
+    return counts
+
+
+def _streamed_rows(divisor, rows, first_row=0):
+    """
+    Yield (n, residues of row n) for rows first_row..rows-1 by running the additive recurrence.
+    Every row is a view that the next step overwrites.
+    """
+    row = np.zeros(max(rows, 1), dtype=np.int64)
+    row[0] = 1 % divisor
+    for n in range(1, first_row):
+        row[1:n + 1] = (row[1:n + 1] + row[:n]) % divisor
+    for n in range(first_row, rows):
+        if n:
+            row[1:n + 1] = (row[1:n + 1] + row[:n]) % divisor
+        yield n, row[:n + 1]
+
+
+def streamed_residue_counts(divisor, rows, first_row=0):
+    """
+    Count of each residue over rows first_row..rows-1 by running the additive recurrence.
+
+    Works for every divisor, costs O(rows**2) time but only O(rows + divisor) memory. Each row is
+    counted from its left half (C(n, k) == C(n, n - k)).
+    """
+    counts = np.zeros(divisor, dtype=np.int64)
+    for n, row in _streamed_rows(divisor, rows, first_row):
+        counts += 2 * np.bincount(row[:(n + 1) // 2], minlength=divisor)
+        if n % 2 == 0:
+            counts[row[n // 2]] += 1
+    return counts
+
+
+def streamed_divisible_count(divisor, rows, first_row=0):
+    """Entries of rows first_row..rows-1 divisible by divisor, like streamed_residue_counts(...)[0]."""
+    count = 0
+    for n, row in _streamed_rows(divisor, rows, first_row):
+        count += 2 * int(np.count_nonzero(row[:(n + 1) // 2] == 0))
+        if n % 2 == 0 and row[n // 2] == 0:
+            count += 1
+    return count
+
+
+def _closed_form_prime(divisor):
+    return divisor <= PRIME_COUNTS_LIMIT and factorize(divisor) == {divisor: 1}
+
+
+def residue_counts(divisor, rows):
+    """Count of each residue 0..divisor-1 over rows 0..rows-1, as an int64 array."""
+    if divisor == 1:
+        return np.array([cell_count(rows)], dtype=np.int64)
+    if _closed_form_prime(divisor):
+        return prime_residue_counts(divisor, rows)
+    return streamed_residue_counts(divisor, rows)
+
+
+def row_residue_counts(n, divisor):
+    """
+    Count of each residue 0..divisor-1 in row n, as an int64 array. Primes up to PRIME_COUNTS_LIMIT
+    use the digit convolution, other divisors look up the n // 2 + 1 entries of the left half.
+    """
+    if divisor == 1:
+        return np.array([n + 1], dtype=np.int64)
+    if _closed_form_prime(divisor):
+        return prime_row_residue_counts(n, divisor)
+    counts = np.zeros(divisor, dtype=np.int64)
+    for residues, weights in _row_lookups(n, divisor):
+        counts += np.bincount(residues, weights=weights, minlength=divisor).astype(np.int64)
+    return counts
+
+
+def _row_lookups(n, divisor, chunk=1 << 20):
+    """
+    Yield (residues, weights) for chunks of the left half of row n, looked up with
+    pascalViewport.binomial_mod_array. Weights are 2 (mirrored entries) or 1 (the middle).
+    The row is never built whole.
+    """
+    from pascalViewport import binomial_mod_array
+
+    half = n // 2 + 1
+    for start in range(0, half, chunk):
+        k = np.arange(start, min(start + chunk, half))
+        yield binomial_mod_array(n, k, divisor), np.where(2 * k == n, 1, 2)
+
+
+def divisible_count(divisor, rows):
+    """Number of entries in rows 0..rows-1 divisible by divisor."""
+    factors = factorize(divisor)
+    if len(factors) == 1:
+        (p, e), = factors.items()
+        return carry_counts(p, rows, e)[e]
+    if divisor == 1:
+        return cell_count(rows)
+    # Divisibility by each prime power is not independent, so composites are counted directly
+    return streamed_divisible_count(divisor, rows)
+
+
+def row_divisible_count(n, divisor):
+    """Number of entries in row n divisible by divisor."""
+    factors = factorize(divisor)
+    if len(factors) == 1:
+        (p, e), = factors.items()
+        return row_carry_counts(n, p, e)[e]
+    return sum(int(weights[residues == 0].sum()) for residues, weights in _row_lookups(n, divisor))
+
+
+def is_streamed(divisor, counts=False):
+    """
+    Whether divisor has no closed form, so that counting rows 0..rows-1 needs the O(rows**2)
+    recurrence and counting a single row n needs O(n) lookups.
+    """
+    if counts:
+        return divisor > 1 and not _closed_form_prime(divisor)
+    return len(factorize(divisor)) > 1
+
+
+def divisor_statistics(divisor, rows, counts=False, row=None):
+    """Statistics of one divisor as a JSON-friendly dict."""
+    if row is None:
+        total = cell_count(rows)
+        divisible = divisible_count(divisor, rows)
+        stats = {"divisor": divisor, "rows": rows, "entries": total, "divisible": divisible}
+    else:
+        total = row + 1
+        divisible = row_divisible_count(row, divisor)
+        stats = {"divisor": divisor, "row": row, "entries": total, "divisible": divisible}
+    stats["divisible_fraction"] = divisible / total if total else 0.0
+    if counts:
+        residues = residue_counts(divisor, rows) if row is None else row_residue_counts(row, divisor)
+        stats["counts"] = residues.tolist()
+    return stats
+
+
+def _argument_error(args, divisors):
+    """Why the statistics asked for by args would be too slow, too big or unsupported, None if they are fine."""
+    if args.counts:
+        too_big = [divisor for divisor in divisors if divisor > COUNTS_DIVISOR_LIMIT]
+        if too_big:
+            return f"--counts lists every residue, divisors {too_big} are above {COUNTS_DIVISOR_LIMIT}"
+        if args.row is None and args.rows >= EXACT_ROWS_LIMIT:
+            return f"--counts is exact for fewer than {EXACT_ROWS_LIMIT} rows"
+        if args.row is not None and args.row >= EXACT_ROWS_LIMIT ** 2 // 4:
+            return f"--counts is exact for rows below {EXACT_ROWS_LIMIT ** 2 // 4}"
+    streamed = [divisor for divisor in divisors if is_streamed(divisor, args.counts)]
+    if not streamed:
+        return None
+    for_counts = " for --counts" if args.counts else ""
+    if args.row is None:
+        if args.rows > args.max_streamed_rows:
+            return (f"divisors {streamed} have no closed form{for_counts} and would be counted row by row "
+                    f"in O(rows^2), use at most {args.max_streamed_rows} rows (or raise --max-streamed-rows)")
+        return None
+    from pascalViewport import supports_divisor
+
+    unsupported = [divisor for divisor in streamed if not supports_divisor(divisor)]
+    if unsupported:
+        return f"divisors {unsupported} have no closed form{for_counts} and are too large for lookups of a single row"
+    if args.row > args.max_row_lookups:
+        return (f"divisors {streamed} have no closed form{for_counts} and would look up every entry of the row, "
+                f"use a row up to {args.max_row_lookups} (or raise --max-row-lookups)")
+    return None
+
+
+def main(argv=None):
+    from pascalBatch import parse_int_list
+
+    parser = argparse.ArgumentParser(description="Residue statistics of Pascal's triangle mod m, without rendering.")
+    parser.add_argument("--divisors", default="2-10", help='Divisors, e.g. "2-10" or "2,3,4,12"')
+    parser.add_argument("--rows", type=int, default=1000, help="Count over rows 0..rows-1")
+    parser.add_argument("--row", type=int, default=None, help="Count a single row instead")
+    parser.add_argument("--counts", action="store_true",
+                        help="Also count every residue (closed form for primes, streamed and O(rows^2) otherwise)")
+    parser.add_argument("--json", action="store_true", help="Print JSON instead of a table")
+    parser.add_argument("--max-streamed-rows", type=int, default=STREAMED_ROWS_LIMIT,
+                        help="Most rows to count row by row for divisors without a closed form")
+    parser.add_argument("--max-row-lookups", type=int, default=ROW_LOOKUPS_LIMIT,
+                        help="Largest --row to count entry by entry for divisors without a closed form")
+    args = parser.parse_args(argv)
+
+    divisors = parse_int_list(args.divisors)
+    if not divisors or divisors[0] < 1:
+        parser.error("divisors must be positive")
+    if args.rows < 0 or (args.row is not None and args.row < 0):
+        parser.error("rows must not be negative")
+    error = _argument_error(args, divisors)
+    if error:
+        parser.error(error)
+
+    results = [divisor_statistics(divisor, args.rows, args.counts, args.row) for divisor in divisors]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+    for stats in results:
+        where = f"row {stats['row']}" if args.row is not None else f"rows 0..{stats['rows'] - 1}"
+        print(f"mod {stats['divisor']:>4}  {where}: {stats['divisible']} of {stats['entries']} divisible "
+              f"({stats['divisible_fraction']:.4%})")
+        if args.counts:
+            print("    " + "  ".join(f"{r}: {count}" for r, count in enumerate(stats["counts"])))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""
+On-disk residue triangles, reopened with mmap so restarts skip the computation.
+
+File layout (little endian):
+    header: magic b"PASCALRS", version (u16), item size in bytes (u16), reserved (u32),
+            divisor (u64), rows (u64)
+    data:   rows 0..rows-1 packed back to back, row n holds n + 1 residues,
+            each stored in the smallest unsigned integer width that fits the divisor
+"""
+
+import mmap
+import os
+import struct
+from pathlib import Path
+
+import numpy as np
+
+from pascalRaster import residue_dtype
+
+MAGIC = b"PASCALRS"
+VERSION = 1
+HEADER = struct.Struct("<8sHHIQQ")
+
+
+def storage_dtype(divisor):
+    """Smallest unsigned integer type holding remainders 0..divisor-1."""
+    if divisor <= 2 ** 8:
+        return np.dtype(np.uint8)
+    if divisor <= 2 ** 16:
+        return np.dtype(np.uint16)
+    return np.dtype(np.uint32)
+
+
+def packed_size(rows):
+    """Number of residues in rows 0..rows-1."""
+    return rows * (rows + 1) // 2
+
+
+def write_residue_file(path, divisor, rows, triangle=None):
+    """
+    Write rows 0..rows-1 mod divisor to path.
+
+    Rows are taken from triangle (a (rows, rows) array) when given, otherwise they are
+    computed one at a time with the additive recurrence. The file is written next to
+    its final name and then renamed, so readers never see a half-written file.
+    """
+    path = Path(path)
+    dtype = storage_dtype(divisor)
+    temp_path = path.with_name(path.name + f".{os.getpid()}.tmp")
+    with open(temp_path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, dtype.itemsize, 0, divisor, rows))
+        row = np.zeros(rows, dtype=np.int64)
+        if rows:
+            row[0] = 1 % divisor
+        for n in range(rows):
+            residues = triangle[n, :n + 1] if triangle is not None else row[:n + 1]
+            file.write(residues.astype(dtype).tobytes())
+            if triangle is None:
+                row[1:] = (row[1:] + row[:-1]) % divisor
+    os.replace(temp_path, path)
+    return path
+
+
+class ResidueFile:
+    """
+    A residue file opened with mmap. row() returns zero-copy views into the mapping (the streaming
+    PNG export reads rows this way), triangle() unpacks into a new dense array for the renderers.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, itemsize, _, self.divisor, self.rows = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != VERSION:
+            self._mmap.close()
+            raise ValueError(f"{self.path} is not a residue file")
+        dtype = storage_dtype(self.divisor)
+        if dtype.itemsize != itemsize:
+            self._mmap.close()
+            raise ValueError(f"{self.path} has an unexpected item size {itemsize}")
+        self.data = np.frombuffer(self._mmap, dtype=dtype, count=packed_size(self.rows), offset=HEADER.size)
+
+    def row(self, n):
+        """Residues of row n, a read-only view into the file."""
+        start = packed_size(n)
+        return self.data[start:start + n + 1]
+
+    def triangle(self, rows=None):
+        """Rows 0..rows-1 copied into a new (rows, rows) array like pascalRaster.residue_triangle."""
+        rows = self.rows if rows is None else min(rows, self.rows)
+        triangle = np.zeros((rows, rows), dtype=residue_dtype(self.divisor))
+        triangle[np.tril_indices(rows)] = self.data[:packed_size(rows)]
+        return triangle
+
+    def close(self):
+        self.data = None
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Row views are still in use, the mapping is released with them
+            pass
+
+
+class DiskResidueStore:
+    """Directory of residue files, one per divisor, kept open once they are used."""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._files = {}
+
+    def path_for(self, divisor):
+        return self.directory / f"pascal_mod_{divisor}.pascalrs"
+
+    def open(self, divisor):
+        """The ResidueFile for divisor, or None when nothing is stored yet."""
+        residue_file = self._files.get(divisor)
+        if residue_file is None:
+            path = self.path_for(divisor)
+            if not path.exists():
+                return None
+            try:
+                residue_file = ResidueFile(path)
+            except (ValueError, struct.error):
+                # Damaged or foreign file, it gets rewritten on the next save
+                return None
+            self._files[divisor] = residue_file
+        return residue_file
+
+    def extend(self, divisor, rows):
+        """
+        The ResidueFile for divisor with at least rows rows. A missing or shorter file is
+        (re)written row by row with the additive recurrence, without a dense triangle.
+        """
+        stored = self.open(divisor)
+        if stored is not None and stored.rows >= rows:
+            return stored
+        if stored is not None:
+            stored.close()
+            del self._files[divisor]
+        write_residue_file(self.path_for(divisor), divisor, rows)
+        return self.open(divisor)
+
+    def save(self, divisor, triangle):
+        """Store triangle if it has more rows than the file already on disk."""
+        stored = self.open(divisor)
+        if stored is not None and stored.rows >= len(triangle):
+            return
+        if stored is not None:
+            stored.close()
+            del self._files[divisor]
+        write_residue_file(self.path_for(divisor), divisor, len(triangle), triangle)
@@ -0,0 +1,275 @@
+"""
+Viewport engine: residues for just the cells visible in a window onto an (effectively) infinite triangle.
+
+Coordinates are in cells: a row number, and a horizontal position where 0 is the triangle's
+center line and cell k of row n spans [k - n/2, k - n/2 + 1). zoom is cells per pixel,
+below 1 the view is zoomed in (cells are bigger than pixels), above 1 it is zoomed out.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+
+from pascalMath import TABLE_LIMIT, _unit_factorials, crt_coefficients
+from pascalRaster import BACKGROUND_INDEX, residue_dtype
+
+# Largest prime with a full table of digit binomials (p * p entries)
+SMALL_TABLE_LIMIT = 512
+
+# Ways to reduce the cells sampled inside one pixel when zoomed out
+DOWNSAMPLE_MODES = ("sample", "any-nonzero", "majority")
+
+
+@lru_cache(maxsize=4)
+def _factorial_tables(p):
+    """Factorials and inverse factorials mod a prime p, as int64 arrays."""
+    fact = [1] * p
+    for i in range(1, p):
+        fact[i] = fact[i - 1] * i % p
+    inv_fact = [1] * p
+    inv_fact[p - 1] = pow(fact[p - 1], p - 2, p)
+    for i in range(p - 1, 0, -1):
+        inv_fact[i - 1] = inv_fact[i] * i % p
+    return np.array(fact, dtype=np.int64), np.array(inv_fact, dtype=np.int64)
+
+
+def _unit_factorial_table(p, q):
+    """pascalMath's cached unit factorial table as a uint32 array, without a copy."""
+    return np.frombuffer(_unit_factorials(p, q), dtype=np.uint32)
+
+
+def _pow_array(base, exponent, modulus):
+    """Elementwise base ** exponent mod modulus for an int64 array (modulus below 2**31)."""
+    result = np.ones_like(base)
+    base = base % modulus
+    while exponent:
+        if exponent & 1:
+            result = result * base % modulus
+        base = base * base % modulus
+        exponent >>= 1
+    return result
+
+
+@lru_cache(maxsize=32)
+def _small_binomial_table(p):
+    """C(a, b) mod prime p for all digits a, b < p as a flat int64 table indexed by a * p + b."""
+    fact, inv_fact = _factorial_tables(p)
+    a = np.arange(p)[:, None]
+    b = np.arange(p)[None, :]
+    table = fact[a] * inv_fact[b] % p * inv_fact[np.clip(a - b, 0, p - 1)] % p
+    return np.where(b <= a, table, 0).ravel()
+
+
+def _lucas_array(n, k, p):
+    """C(n, k) mod prime p elementwise (Lucas' theorem), for 0 <= k <= n."""
+    if p == 2:
+        # C(n, k) is odd exactly when the bits of k are a subset of the bits of n
+        return ((k & (n - k)) == 0).astype(np.int64)
+    result = np.ones(np.broadcast_shapes(n.shape, k.shape), dtype=np.int64)
+    if p <= SMALL_TABLE_LIMIT:
+        table = _small_binomial_table(p)
+        while n.any():
+            n, n_digit = np.divmod(n, p)
+            k, k_digit = np.divmod(k, p)
+            result = result * table[n_digit * p + k_digit] % p
+        return result
+    fact, inv_fact = _factorial_tables(p)
+    while n.any():
+        n, n_digit = np.divmod(n, p)
+        k, k_digit = np.divmod(k, p)
+        fits = k_digit <= n_digit
+        diff = np.where(fits, n_digit - k_digit, 0)
+        term = fact[n_digit] * inv_fact[k_digit] % p * inv_fact[diff] % p
+        result = np.where(fits, result * term % p, 0)
+    return result
+
+
+def _factorial_parts_array(n, p, q):
+    """
+    Split n! into p**exponent times a unit, elementwise, returns (unit mod q, exponent).
+
+    One pass over the base-p digits gives both Legendre's exponent and the unit part.
+    """
+    table = _unit_factorial_table(p, q)
+    # The product of all units below q is -1 or 1 mod q, every full block of q flips the sign if -1
+    negative_block = table[q - 1] == q - 1
+    units = np.ones_like(n)
+    exponent = np.zeros_like(n)
+    blocks = np.zeros_like(n)
+    while n.any():
+        if p == 2:
+            # Shifts and masks are much cheaper than integer division
+            quotient, remainder = n >> (q.bit_length() - 1), n & (q - 1)
+            n = n >> 1
+        else:
+            quotient, remainder = np.divmod(n, q)
+            n = n // p
+        units = units * table[remainder] % q
+        blocks += quotient
+        exponent += n
+    if negative_block:
+        units = np.where(blocks & 1, q - units, units)
+    return units, exponent
+
+
+def _prime_power_array(n, k, p, e):
+    """C(n, k) mod p**e elementwise (Kummer's theorem plus unit factorials), for 0 <= k <= n."""
+    q = p ** e
+    n_units, n_exponent = _factorial_parts_array(n, p, q)
+    k_units, k_exponent = _factorial_parts_array(k, p, q)
+    rest_units, rest_exponent = _factorial_parts_array(n - k, p, q)
+    # Number of carries when adding k and n-k in base p (Kummer)
+    carries = n_exponent - k_exponent - rest_exponent
+    # Units mod p**e form a group of order q - q // p
+    units = n_units * _pow_array(k_units * rest_units % q, q - q // p - 1, q) % q
+    powers = np.power(p, np.minimum(carries, e)).astype(np.int64)
+    return np.where(carries >= e, 0, units * powers % q)
+
+
+def supports_divisor(divisor):
+    """Whether binomial_mod_array (and so the viewport) can handle divisor."""
+    return divisor < 2 ** 31 and all(p ** e <= TABLE_LIMIT for p, e, _ in crt_coefficients(divisor))
+
+
+def binomial_mod_array(n, k, divisor):
+    """
+    Vectorized pascalMath.binomial_mod: C(n, k) mod divisor for int64 arrays n and k.
+
+    Entries with k < 0 or k > n are 0. The divisor has to be below 2**31 so that
+    products of two residues fit in int64, and its prime powers at most TABLE_LIMIT
+    (see supports_divisor), scalar lookups above that cost O(prime power) each.
+    """
+    if not supports_divisor(divisor):
+        raise ValueError(f"divisor must be below 2**31 with prime powers up to {TABLE_LIMIT} for vectorized lookups")
+    n, k = np.broadcast_arrays(np.asarray(n, dtype=np.int64), np.asarray(k, dtype=np.int64))
+    valid = (k >= 0) & (k <= n)
+    n, k = np.where(valid, n, 0), np.where(valid, k, 0)
+    result = np.zeros(n.shape, dtype=np.int64)
+    if divisor == 1:
+        return result
+    for p, e, coefficient in crt_coefficients(divisor):
+        residue = _lucas_array(n, k, p) if e == 1 else _prime_power_array(n, k, p, e)
+        result = (result + residue * coefficient) % divisor
+    return np.where(valid, result, 0)
+
+
+def _cell_rows_and_columns(height, width, top_row, left_col, zoom, offset_y=0.5, offset_x=0.5):
+    """Row n and column k of the cell under each pixel (sampled at the given offsets inside the pixel)."""
+    n = np.floor(top_row + (np.arange(height) + offset_y) * zoom).astype(np.int64)[:, None]
+    position = left_col + (np.arange(width) + offset_x) * zoom
+    k = np.floor(position[None, :] + n / 2).astype(np.int64)
+    return n, k
+
+
+def _zoomed_in_indices(divisor, height, width, top_row, left_col, zoom):
+    """
+    Index image when every pixel row shows a single cell row.
+
+    The visible rows are consecutive, so only the top visible row is looked up directly
+    and the rows below follow from the additive recurrence.
+    """
+    n, k = _cell_rows_and_columns(height, width, top_row, left_col, zoom)
+    inside = (n >= 0) & (k >= 0) & (k <= n)
+    image = np.full((height, width), BACKGROUND_INDEX, dtype=residue_dtype(divisor))
+    if not inside.any():
+        return image
+    first_row = max(int(n.min()), 0)
+    last_row = int(n.max())
+    rows = n[:, 0]
+
+    # Row n needs C(first_row, j) for k - (n - first_row) <= j <= k
+    lowest = int(np.where(inside, k - (n - first_row), np.iinfo(np.int64).max).min())
+    highest = int(np.where(inside, k, -1).max())
+    window = binomial_mod_array(first_row, np.arange(lowest, highest + 1), divisor)
+
+    for row in range(first_row, last_row + 1):
+        line = (rows == row).nonzero()[0]
+        if len(line):
+            ks = k[line]
+            image[line] = np.where(inside[line], window[np.clip(ks - lowest, 0, len(window) - 1)] + 1,
+                                   BACKGROUND_INDEX)
+        # C(n+1, j) = C(n, j) + C(n, j-1), the leftmost entry goes stale and is not used again
+        window[1:] = (window[1:] + window[:-1]) % divisor
+    return image
+
+
+def _zoomed_out_indices(divisor, height, width, top_row, left_col, zoom, downsample, samples):
+    """Index image when every pixel covers many cells, reduced from samples x samples lookups per pixel."""
+    if downsample == "sample":
+        samples = 1
+    images = []
+    for i in range(samples):
+        for j in range(samples):
+            n, k = _cell_rows_and_columns(height, width, top_row, left_col, zoom,
+                                          (i + 0.5) / samples, (j + 0.5) / samples)
+            inside = (n >= 0) & (k >= 0) & (k <= n)
+            # Only cells inside the triangle are looked up
+            image = np.full(k.shape, BACKGROUND_INDEX, dtype=np.int64)
+            image[inside] = binomial_mod_array(np.broadcast_to(n, k.shape)[inside], k[inside], divisor) + 1
+            images.append(image)
+    stack = np.stack(images, axis=-1)
+
+    if downsample == "majority":
+        # Most common index among the samples of each pixel
+        counts = np.stack([(stack == stack[..., s:s + 1]).sum(axis=-1) for s in range(stack.shape[-1])], axis=-1)
+        image = np.take_along_axis(stack, counts.argmax(axis=-1)[..., None], axis=-1)[..., 0]
+    else:
+        # Index 0 is background, 1 is remainder 0, so the maximum prefers any nonzero remainder
+        image = stack.max(axis=-1)
+    return image.astype(residue_dtype(divisor))
+
+
+def viewport_index_image(divisor, width, height, top_row, left_col, zoom, downsample="any-nonzero", samples=2):
+    """
+    Palette-indexed (height, width) image of a window onto the triangle.
+
+    Args:
+        divisor: Modulus for coloring.
+        width, height: Size of the window in pixels.
+        top_row: Row (may be fractional) at the top edge of the window.
+        left_col: Horizontal cell position of the left edge (0 is the center line).
+        zoom: Cells per pixel.
+        downsample: One of DOWNSAMPLE_MODES, used when zoom > 1.
+        samples: Samples per pixel side when zoomed out.
+
+    Returns:
+        Image with BACKGROUND_INDEX outside the triangle and remainder + 1 inside,
+        like pascalRaster.triangle_index_image.
+    """
+    if downsample not in DOWNSAMPLE_MODES:
+        raise ValueError(f"downsample must be one of {DOWNSAMPLE_MODES}")
+    if zoom <= 1:
+        return _zoomed_in_indices(divisor, height, width, top_row, left_col, zoom)
+    return _zoomed_out_indices(divisor, height, width, top_row, left_col, zoom, downsample, samples)
+
+
+class Viewport:
+    """Position and zoom of a window onto the triangle, with the usual pan/zoom operations."""
+
+    def __init__(self, width, height, zoom=1.0, top_row=0.0, center_col=0.0):
+        self.width = width
+        self.height = height
+        self.zoom = zoom
+        self.top_row = top_row
+        self.center_col = center_col
+
+    @property
+    def left_col(self):
+        return self.center_col - self.width / 2 * self.zoom
+
+    def pan(self, dx, dy):
+        """Move the view by (dx, dy) pixels."""
+        self.center_col += dx * self.zoom
+        self.top_row = max(self.top_row + dy * self.zoom, -self.height * self.zoom / 2)
+
+    def zoom_at(self, factor, x, y):
+        """Multiply cells per pixel by factor, keeping the cell under pixel (x, y) in place."""
+        row = self.top_row + y * self.zoom
+        col = self.left_col + x * self.zoom
+        self.zoom = min(max(self.zoom * factor, 1 / 64), 2.0 ** 44)
+        self.top_row = row - y * self.zoom
+        self.center_col = col - x * self.zoom + self.width / 2 * self.zoom
+
+    def index_image(self, divisor, downsample="any-nonzero", samples=2):
+        return viewport_index_image(divisor, self.width, self.height, self.top_row, self.left_col,
+                                    self.zoom, downsample, samples)
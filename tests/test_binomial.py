@@ -0,0 +1,47 @@
+from math import comb
+
+import numpy as np
+import pytest
+
+from pascalMath import binomial_mod, cached_binomial_mod, residue_row
+from pascalViewport import binomial_mod_array
+
+# Primes, prime powers (including 2**e with its different Wilson sign) and composites
+DIVISORS = [1, 2, 3, 5, 7, 4, 8, 16, 9, 27, 25, 6, 12, 30, 100, 360]
+ROWS = 40
+
+
+@pytest.mark.parametrize("divisor", DIVISORS)
+def test_binomial_mod_matches_comb(divisor):
+    for n in range(ROWS):
+        for k in range(-1, n + 2):
+            expected = comb(n, k) % divisor if 0 <= k <= n else 0
+            assert binomial_mod(n, k, divisor) == expected, (n, k)
+            assert cached_binomial_mod(n, k, divisor) == expected, (n, k)
+
+
+@pytest.mark.parametrize("divisor", DIVISORS)
+def test_binomial_mod_array_matches_comb(divisor):
+    n, k = np.meshgrid(np.arange(ROWS), np.arange(-2, ROWS + 2), indexing="ij")
+    expected = [[comb(a, b) % divisor if 0 <= b <= a else 0 for b in row_k] for a, row_k in zip(n[:, 0], k)]
+    assert binomial_mod_array(n, k, divisor).tolist() == expected
+
+
+@pytest.mark.parametrize("divisor", [2, 7, 8, 12, 81])
+def test_large_rows_agree_between_scalar_and_vectorized(divisor):
+    rng = np.random.default_rng(divisor)
+    n = rng.integers(0, 10 ** 12, 200)
+    k = n // rng.integers(1, 10, 200)
+    expected = [binomial_mod(int(a), int(b), divisor) for a, b in zip(n, k)]
+    assert binomial_mod_array(n, k, divisor).tolist() == expected
+
+
+def test_large_row_against_comb():
+    n = 3 ** 9 + 5
+    for divisor in (3, 9, 10, 12):
+        assert residue_row(n, divisor)[::97] == [comb(n, k) % divisor for k in range(0, n + 1, 97)]
+
+
+def test_binomial_mod_array_refuses_untabled_divisors():
+    with pytest.raises(ValueError):
+        binomial_mod_array(np.arange(3), 1, 2 ** 31 - 1)
@@ -0,0 +1,64 @@
+from math import comb
+
+import numpy as np
+import pytest
+
+from pascalRaster import (ResidueStore, crt_residue_triangle, residue_block, residue_dtype,
+                          residue_triangle, residue_triangle_by_rows)
+
+PRIMES = [2, 3, 5, 7]
+
+
+def comb_triangle(divisor, rows):
+    triangle = np.zeros((rows, rows), dtype=np.int64)
+    for n in range(rows):
+        triangle[n, :n + 1] = [comb(n, k) % divisor for k in range(n + 1)]
+    return triangle
+
+
+def around_powers(p, limit=60):
+    """Row counts p**k - 1, p**k and p**k + 1 below limit, where the fractal levels change."""
+    counts = {1}
+    q = p
+    while q - 1 < limit:
+        counts.update(c for c in (q - 1, q, q + 1) if 0 < c < limit)
+        q *= p
+    return sorted(counts)
+
+
+CASES = [(p, rows) for p in PRIMES for rows in around_powers(p)]
+
+
+@pytest.mark.parametrize("divisor, rows", CASES + [(6, 20), (12, 37), (360, 30)])
+def test_residue_triangle_matches_comb(divisor, rows):
+    expected = comb_triangle(divisor, rows)
+    assert residue_triangle(divisor, rows).tolist() == expected.tolist()
+    assert residue_triangle_by_rows(divisor, rows).tolist() == expected.tolist()
+
+
+@pytest.mark.parametrize("divisor, rows", CASES + [(6, 20), (12, 37)])
+def test_residue_triangle_extends_prefix(divisor, rows):
+    expected = comb_triangle(divisor, rows)
+    for done in sorted({1, rows // 2, divisor, rows - 1, rows, rows + 3}):
+        prefix = residue_triangle(divisor, done)
+        assert residue_triangle(divisor, rows, prefix=prefix).tolist() == expected.tolist(), done
+
+
+@pytest.mark.parametrize("divisor, rows", CASES + [(6, 20), (12, 37), (360, 30)])
+def test_residue_block_matches_comb(divisor, rows):
+    expected = comb_triangle(divisor, rows)
+    bounds = sorted({0, divisor - 1, divisor, divisor + 1, rows // 2, rows - 1, rows} & set(range(rows + 1)))
+    for first_row in bounds:
+        for last_row in (b for b in bounds if b > first_row):
+            block = residue_block(divisor, first_row, last_row)
+            assert block.shape == (last_row - first_row, last_row)
+            assert block.tolist() == expected[first_row:last_row, :last_row].tolist(), (first_row, last_row)
+
+
+# Mixed-radix table path up to CRT_TABLE_LIMIT (12, 360), int64 multiply-add path above it
+@pytest.mark.parametrize("divisor", [12, 360, 65538, 510510])
+@pytest.mark.parametrize("rows", [1, 9, 40])
+def test_crt_residue_triangle_matches_comb(divisor, rows):
+    triangle = crt_residue_triangle(divisor, rows, store=ResidueStore())
+    assert triangle.dtype == residue_dtype(divisor)
+    assert triangle.tolist() == comb_triangle(divisor, rows).tolist()
@@ -0,0 +1,75 @@
+from math import comb
+
+import numpy as np
+import pytest
+
+from pascalStats import (carry_counts, divisible_count, is_streamed, main, residue_counts, row_divisible_count,
+                         row_residue_counts, streamed_residue_counts)
+
+DIVISORS = [1, 2, 3, 5, 7, 13, 4, 8, 9, 25, 6, 12]
+
+
+def brute_counts(divisor, rows):
+    counts = np.zeros(divisor, dtype=np.int64)
+    for n in range(rows):
+        for k in range(n + 1):
+            counts[comb(n, k) % divisor] += 1
+    return counts
+
+
+@pytest.mark.parametrize("divisor", DIVISORS)
+@pytest.mark.parametrize("rows", [0, 1, 2, 6, 27, 50, 130])
+def test_counts_over_rows(divisor, rows):
+    expected = brute_counts(divisor, rows)
+    assert residue_counts(divisor, rows).tolist() == expected.tolist()
+    assert divisible_count(divisor, rows) == expected[0]
+
+
+@pytest.mark.parametrize("divisor", DIVISORS)
+@pytest.mark.parametrize("n", [0, 1, 7, 48, 99, 128])
+def test_counts_in_one_row(divisor, n):
+    expected = np.bincount([comb(n, k) % divisor for k in range(n + 1)], minlength=divisor)
+    assert row_residue_counts(n, divisor).tolist() == expected.tolist()
+    assert row_divisible_count(n, divisor) == expected[0]
+
+
+def test_carry_counts_are_p_adic_valuations():
+    p, rows, limit = 3, 60, 3
+    expected = [0] * (limit + 1)
+    for n in range(rows):
+        for k in range(n + 1):
+            value, valuation = comb(n, k), 0
+            while value % p == 0:
+                value //= p
+                valuation += 1
+            expected[min(valuation, limit)] += 1
+    assert carry_counts(p, rows, limit) == expected
+
+
+def test_streamed_counts_from_a_first_row():
+    assert (streamed_residue_counts(6, 40, first_row=10) ==
+            brute_counts(6, 40) - brute_counts(6, 10)).all()
+
+
+def test_cli_refuses_long_streaming(capsys):
+    with pytest.raises(SystemExit):
+        main(["--divisors", "6", "--rows", "1000000"])
+    assert main(["--divisors", "7,8", "--rows", "1000000"]) == 0
+    assert "mod    8" in capsys.readouterr().out
+
+
+def test_primes_above_the_closed_form_limit_are_streamed():
+    p = 4099
+    assert not is_streamed(7, counts=True) and is_streamed(p, counts=True)
+    assert residue_counts(p, 30).tolist() == brute_counts(p, 30).tolist()
+
+
+@pytest.mark.parametrize("arguments", [
+    ["--divisors", "100003", "--rows", "10", "--counts"],
+    ["--divisors", "7", "--rows", "10000000000", "--counts"],
+    ["--divisors", "12", "--row", "20000000"],
+    ["--divisors", "25165824", "--row", "100"],
+])
+def test_cli_refuses_slow_or_unsupported_statistics(arguments):
+    with pytest.raises(SystemExit):
+        main(arguments)
@@ -0,0 +1,63 @@
+from math import comb
+
+import numpy as np
+import pytest
+
+from pascalRaster import residue_triangle
+from pascalStore import DiskResidueStore, ResidueFile, write_residue_file
+
+# One divisor per storage width (uint8, uint16, uint32), including the width boundaries
+DIVISORS = [2, 7, 12, 256, 257, 65536, 65537]
+ROWS = 30
+
+
+def comb_rows(divisor, rows):
+    return [[comb(n, k) % divisor for k in range(n + 1)] for n in range(rows)]
+
+
+@pytest.mark.parametrize("divisor", DIVISORS)
+@pytest.mark.parametrize("dense", [False, True])
+def test_residue_file_round_trip(tmp_path, divisor, dense):
+    path = tmp_path / "triangle.pascalrs"
+    triangle = residue_triangle(divisor, ROWS) if dense else None
+    write_residue_file(path, divisor, ROWS, triangle)
+    stored = ResidueFile(path)
+    try:
+        assert (stored.divisor, stored.rows) == (divisor, ROWS)
+        expected = comb_rows(divisor, ROWS)
+        assert [stored.row(n).tolist() for n in range(ROWS)] == expected
+        dense_rows = stored.triangle()
+        assert [dense_rows[n, :n + 1].tolist() for n in range(ROWS)] == expected
+        assert not np.triu(dense_rows, 1).any()
+        assert stored.triangle(5).shape == (5, 5)
+    finally:
+        stored.close()
+
+
+def test_residue_file_rejects_foreign_files(tmp_path):
+    path = tmp_path / "foreign.pascalrs"
+    path.write_bytes(b"NOTPASCAL" + bytes(40))
+    with pytest.raises(ValueError):
+        ResidueFile(path)
+
+
+@pytest.mark.parametrize("divisor", [3, 360])
+def test_disk_store_extends_shorter_files(tmp_path, divisor):
+    store = DiskResidueStore(tmp_path)
+    assert store.open(divisor) is None
+    store.save(divisor, residue_triangle(divisor, 10))
+    assert store.open(divisor).rows == 10
+
+    # A shorter triangle never replaces a longer file
+    store.save(divisor, residue_triangle(divisor, 4))
+    assert store.open(divisor).rows == 10
+
+    extended = store.extend(divisor, ROWS)
+    assert extended.rows == ROWS
+    assert [extended.row(n).tolist() for n in range(ROWS)] == comb_rows(divisor, ROWS)
+    assert store.extend(divisor, 12) is extended
+
+    # A fresh store reopens the extended file from disk
+    reopened = DiskResidueStore(tmp_path).open(divisor)
+    assert reopened.rows == ROWS
+    assert reopened.triangle().tolist() == extended.triangle().tolist()